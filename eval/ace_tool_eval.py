@@ -5,6 +5,10 @@ Usage:
     # Step 2: Call ace-tool for each instance and save results
     # Step 3: Compute metrics
     uv run python eval/ace_tool_eval.py compute-metrics eval/ace_tool_results.json
+
+    # Score large result files with the parallel Numba kernel
+    # (needs numba: pip install openace[eval-fast])
+    uv run python eval/ace_tool_eval.py compute-metrics eval/ace_tool_results.json --fast
 """
 
 from __future__ import annotations
@@ -12,17 +16,50 @@ from __future__ import annotations
 import json
 import re
 import sys
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
 
+try:  # orjson is optional; its C parser/encoder is much faster on large result files
+    import orjson
+
+    _loads = orjson.loads
+
+    def _dumps(obj: object) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+
+except ImportError:
+    _loads = json.loads
+
+    def _dumps(obj: object) -> bytes:
+        return json.dumps(obj, indent=2).encode()
+
+_CHUNK_SUFFIX_RE = re.compile(r'#chunk\d+of\d+$')
+_DEF_RE = re.compile(r'(?:async\s+)?def\s+(\w+)\s*\(')
+_CLASS_RE = re.compile(r'class\s+(\w+)\s*[:(]')
+
+# Boilerplate dunders that never identify the function a patch touches
+_SKIP_FUNCS = frozenset({'__init__', '__str__', '__repr__'})
 
-@dataclass
+
+@dataclass(slots=True)
 class AceToolInstanceResult:
     instance_id: str
     gold_files: list[str]
     gold_functions: list[str]
     retrieved_files: list[str]
     retrieved_functions: list[str]
+    # Derived once at construction so metric computation never rebuilds them
+    normalized_retrieved_files: list[str] = field(init=False)
+    gold_files_set: frozenset[str] = field(init=False)
+    gold_funcs_set: frozenset[str] = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.gold_files_set = frozenset(self.gold_files)
+        self.gold_funcs_set = frozenset(self.gold_functions)
+        self.normalized_retrieved_files = _match_gold_files(
+            self.gold_files, self.gold_files_set, self.retrieved_files
+        )
 
 
 def parse_ace_tool_output(raw_output: str) -> tuple[list[str], list[str]]:
@@ -43,25 +80,49 @@ def parse_ace_tool_output(raw_output: str) -> tuple[list[str], list[str]]:
     seen_files: set[str] = set()
     function_names: list[str] = []
     seen_funcs: set[str] = set()
+    class_names: list[str] = []
+
+    # Substring checks run in C; skip per-line work that cannot match
+    want_paths = 'Path:' in raw_output
+    want_defs = 'def' in raw_output or 'class' in raw_output
+    if not (want_paths or want_defs):
+        return file_paths, function_names
+
+    # Single pass over the output: cheap prefix checks decide which lines
+    # are worth handing to the (anchored) identifier regexes.
+    for line in raw_output.splitlines():
+        if line.startswith('Path:'):
+            rest = line[5:]
+            if not rest[:1].isspace():
+                continue
+            # Drop the "#chunkNofM" suffix ace-tool appends to split files
+            i = rest.rfind('#chunk')
+            if i >= 0 and _CHUNK_SUFFIX_RE.match(rest, i):
+                rest = rest[:i]
+            path = rest.strip()
+            if path and path not in seen_files:
+                seen_files.add(path)
+                file_paths.append(path)
+            continue
+        if not want_defs:
+            continue
 
-    # Extract file paths in order (deduplicate, keep first occurrence)
-    for m in re.finditer(r'^Path:\s+(.+?)(?:#chunk\d+of\d+)?$', raw_output, re.MULTILINE):
-        path = m.group(1).strip()
-        if path not in seen_files:
-            seen_files.add(path)
-            file_paths.append(path)
-
-    # Extract function/method definitions from code snippets
-    # Look for Python function definitions: def func_name(
-    for m in re.finditer(r'^\s*(?:async\s+)?def\s+(\w+)\s*\(', raw_output, re.MULTILINE):
-        name = m.group(1)
-        if name not in seen_funcs and name not in {'__init__', '__str__', '__repr__'}:
-            seen_funcs.add(name)
-            function_names.append(name)
-
-    # Also look for class definitions
-    for m in re.finditer(r'^\s*class\s+(\w+)\s*[:(]', raw_output, re.MULTILINE):
-        name = m.group(1)
+        stripped = line.lstrip()
+        if stripped.startswith(('def', 'async')):
+            # Python function definitions: def func_name(
+            m = _DEF_RE.match(stripped)
+            if m:
+                name = m.group(1)
+                if name not in seen_funcs and name not in _SKIP_FUNCS:
+                    seen_funcs.add(name)
+                    function_names.append(name)
+        elif stripped.startswith('class'):
+            m = _CLASS_RE.match(stripped)
+            if m:
+                class_names.append(m.group(1))
+
+    # Class definitions rank after all functions
+    for name in class_names:
         if name not in seen_funcs:
             seen_funcs.add(name)
             function_names.append(name)
@@ -69,55 +130,66 @@ def parse_ace_tool_output(raw_output: str) -> tuple[list[str], list[str]]:
     return file_paths, function_names
 
 
-def _recall_at_k(gold: list[str], retrieved: list[str], k: int) -> float:
-    """Fraction of gold items found in the top-k retrieved items."""
-    if not gold:
-        return 1.0
-    top_k = set(retrieved[:k])
-    hits = sum(1 for g in gold if g in top_k)
-    return hits / len(gold)
+def _basename(p: str) -> str:
+    """Final component of a POSIX-style (SWE-bench) path, without building a ``Path``."""
+    # str.rpartition does the scan in C; it beats both pathlib and posixpath.basename
+    return p.rpartition('/')[2]
 
 
-def _mrr(gold: list[str], retrieved: list[str]) -> float:
-    """Mean Reciprocal Rank: 1/rank of the first gold hit, or 0."""
-    gold_set = set(gold)
-    for i, item in enumerate(retrieved, start=1):
-        if item in gold_set:
-            return 1.0 / i
-    return 0.0
+# Recall cutoffs reported for files and functions (ascending)
+_FILE_KS = (1, 5, 10, 20)
+_FUNC_KS = (5, 10)
 
 
-def _first_rank(gold: list[str], retrieved: list[str]) -> int:
-    """Rank (1-based) of the first gold hit, or 0 if not found."""
-    gold_set = set(gold)
-    for i, item in enumerate(retrieved, start=1):
-        if item in gold_set:
-            return i
-    return 0
+def _recalls_at(hit_ranks: list[int], n_gold: int, ks: tuple[int, ...]) -> list[float]:
+    """Recall at each cutoff in ascending *ks*, given the ascending gold hit ranks.
 
+    One merge-walk over ranks and cutoffs snapshots the running hit count at
+    every k; nothing is sliced or re-scanned per cutoff.
+    """
+    if not n_gold:
+        return [1.0] * len(ks)
+    recalls: list[float] = []
+    hits = 0
+    n_hits = len(hit_ranks)
+    for k in ks:
+        while hits < n_hits and hit_ranks[hits] <= k:
+            hits += 1
+        recalls.append(hits / n_gold)
+    return recalls
 
-def _match_gold_files(gold_files: list[str], retrieved_files: list[str]) -> list[str]:
-    """Match retrieved files against gold files by basename.
 
-    ace-tool returns relative paths. Gold files from SWE-bench are also relative.
-    We match by full path first, then by basename as fallback.
+# Reciprocal-rank lookup table; index 0 (no gold hit) maps to 0.0
+_INV_RANK = tuple(0.0 if i == 0 else 1.0 / i for i in range(1025))
+
+
+def _reciprocal_rank(rank: int) -> float:
+    """1/rank for a 1-based rank, or 0.0 when nothing was found (rank 0)."""
+    return _INV_RANK[rank] if rank < len(_INV_RANK) else 1.0 / rank
+
+
+@lru_cache(maxsize=4096)
+def _gold_basename_map(gold_files: tuple[str, ...]) -> dict[str, str]:
+    """Basename -> gold path, shared by every retriever scored against the same gold set.
+
+    The returned dict is cached; callers must not mutate it.
     """
-    matched: list[str] = []
-    gold_basenames = {Path(f).name: f for f in gold_files}
+    return {_basename(f): f for f in gold_files}
 
-    for rf in retrieved_files:
-        # Try full path match first
-        if rf in gold_files:
-            matched.append(rf)
-            continue
-        # Try basename match
-        basename = Path(rf).name
-        if basename in gold_basenames:
-            matched.append(gold_basenames[basename])
-        else:
-            matched.append(rf)  # keep original for non-gold files
 
-    return matched
+def _match_gold_files(
+    gold_files: list[str], gold_set: frozenset[str], retrieved_files: list[str]
+) -> list[str]:
+    """Normalize retrieved files to the gold format.
+
+    ace-tool returns relative paths. Gold files from SWE-bench are also relative.
+    We match by full path first, then by basename as fallback.
+    """
+    gold_basenames = _gold_basename_map(tuple(gold_files))
+    return [
+        rf if rf in gold_set else gold_basenames.get(_basename(rf), rf)
+        for rf in retrieved_files
+    ]
 
 
 def _match_gold_funcs(gold_functions: list[str], retrieved_functions: list[str]) -> list[str]:
@@ -126,12 +198,38 @@ def _match_gold_funcs(gold_functions: list[str], retrieved_functions: list[str])
     return retrieved_functions
 
 
+def _gold_hit_ranks(gold_set: frozenset[str], retrieved: list[str]) -> list[int]:
+    """1-based ranks at which each distinct gold item first appears in *retrieved*."""
+    hit_ranks: list[int] = []
+    if not gold_set:
+        return hit_ranks
+    # One mutable copy of the gold set doubles as the "already found" check
+    remaining = set(gold_set)
+    for i, item in enumerate(retrieved, 1):
+        if item in remaining:
+            remaining.remove(item)
+            hit_ranks.append(i)
+            if not remaining:
+                break
+    return hit_ranks
+
+
 def compute_instance_metrics(result: AceToolInstanceResult) -> dict:
-    """Compute all metrics for a single instance."""
-    # Normalize retrieved files to match gold format
-    retrieved_files_normalized = _match_gold_files(
-        result.gold_files, result.retrieved_files
+    """Compute all metrics for a single instance.
+
+    Each retrieved list is walked once, recording the 1-based rank at which
+    every distinct gold item is first hit; recall@k, MRR and first rank are
+    all derived from those ranks.
+    """
+    file_hit_ranks = _gold_hit_ranks(result.gold_files_set, result.normalized_retrieved_files)
+    func_hit_ranks = _gold_hit_ranks(result.gold_funcs_set, result.retrieved_functions)
+
+    first_file_rank = file_hit_ranks[0] if file_hit_ranks else 0
+    first_func_rank = func_hit_ranks[0] if func_hit_ranks else 0
+    file_r1, file_r5, file_r10, file_r20 = _recalls_at(
+        file_hit_ranks, len(result.gold_files), _FILE_KS
     )
+    func_r5, func_r10 = _recalls_at(func_hit_ranks, len(result.gold_functions), _FUNC_KS)
 
     return {
         "instance_id": result.instance_id,
@@ -139,29 +237,197 @@ def compute_instance_metrics(result: AceToolInstanceResult) -> dict:
         "gold_functions": result.gold_functions,
         "retrieved_files": result.retrieved_files,
         "retrieved_functions": result.retrieved_functions,
-        "file_recall_at_1": _recall_at_k(result.gold_files, retrieved_files_normalized, 1),
-        "file_recall_at_5": _recall_at_k(result.gold_files, retrieved_files_normalized, 5),
-        "file_recall_at_10": _recall_at_k(result.gold_files, retrieved_files_normalized, 10),
-        "file_recall_at_20": _recall_at_k(result.gold_files, retrieved_files_normalized, 20),
-        "function_recall_at_5": _recall_at_k(result.gold_functions, result.retrieved_functions, 5),
-        "function_recall_at_10": _recall_at_k(result.gold_functions, result.retrieved_functions, 10),
-        "file_mrr": _mrr(result.gold_files, retrieved_files_normalized),
-        "function_mrr": _mrr(result.gold_functions, result.retrieved_functions),
-        "first_gold_file_rank": _first_rank(result.gold_files, retrieved_files_normalized),
+        "file_recall_at_1": file_r1,
+        "file_recall_at_5": file_r5,
+        "file_recall_at_10": file_r10,
+        "file_recall_at_20": file_r20,
+        "function_recall_at_5": func_r5,
+        "function_recall_at_10": func_r10,
+        "file_mrr": _reciprocal_rank(first_file_rank),
+        "function_mrr": _reciprocal_rank(first_func_rank),
+        "first_gold_file_rank": first_file_rank,
     }
 
 
+@lru_cache(maxsize=None)
+def _metrics_kernel():
+    """Build the Numba kernel behind ``--fast`` (numba is imported on first use).
+
+    The kernel scores many instances in parallel over CSR-encoded id arrays:
+    instance ``i`` owns ``gold_ids[gold_off[i]:gold_off[i + 1]]`` (distinct
+    gold ids) and ``retr_ids[retr_off[i]:retr_off[i + 1]]`` (retrieved ids in
+    rank order). Row ``i`` of ``out`` receives recall at each of ``ks``,
+    followed by MRR and the first gold rank.
+    """
+    try:
+        import numba
+        import numpy as np
+    except ImportError:
+        raise ImportError(
+            "--fast requires numba. Install with: pip install openace[eval-fast]"
+        ) from None
+
+    @numba.njit(parallel=True)
+    def kernel(gold_off, gold_ids, gold_len, retr_off, retr_ids, ks, out):
+        nk = ks.size
+        for i in numba.prange(gold_off.size - 1):
+            g0 = gold_off[i]
+            n_distinct = gold_off[i + 1] - g0
+            found = np.zeros(n_distinct, dtype=np.bool_)
+            hits = np.zeros(nk, dtype=np.int64)
+            n_found = 0
+            first = 0
+            r0 = retr_off[i]
+            for j in range(r0, retr_off[i + 1]):
+                if n_found == n_distinct:
+                    break
+                item = retr_ids[j]
+                for g in range(n_distinct):
+                    if gold_ids[g0 + g] == item and not found[g]:
+                        found[g] = True
+                        n_found += 1
+                        rank = j - r0 + 1
+                        if first == 0:
+                            first = rank
+                        for q in range(nk):
+                            if rank <= ks[q]:
+                                hits[q] += 1
+                        break
+            n_gold = gold_len[i]
+            for q in range(nk):
+                out[i, q] = hits[q] / n_gold if n_gold > 0 else 1.0
+            out[i, nk] = 1.0 / first if first > 0 else 0.0
+            out[i, nk + 1] = first
+
+    return kernel
+
+
+def _score_batch(
+    golds: list[frozenset[str]],
+    gold_lens: list[int],
+    retrieved: list[list[str]],
+    ks: tuple[int, ...],
+):
+    """Run the metrics kernel over one gold/retrieved column of many instances."""
+    import numpy as np
+
+    ids: dict[str, int] = {}
+
+    def _encode(lists) -> tuple:
+        off = np.zeros(len(lists) + 1, dtype=np.int64)
+        flat: list[int] = []
+        for i, items in enumerate(lists):
+            flat.extend(ids.setdefault(x, len(ids)) for x in items)
+            off[i + 1] = len(flat)
+        return off, np.asarray(flat, dtype=np.int64)
+
+    gold_off, gold_ids = _encode(golds)
+    retr_off, retr_ids = _encode(retrieved)
+    out = np.empty((len(golds), len(ks) + 2), dtype=np.float64)
+    _metrics_kernel()(
+        gold_off, gold_ids, np.asarray(gold_lens, dtype=np.int64),
+        retr_off, retr_ids, np.asarray(ks, dtype=np.int64), out,
+    )
+    return out
+
+
+def compute_instance_metrics_fast(results: list[AceToolInstanceResult]) -> list[dict]:
+    """Compute :func:`compute_instance_metrics` for many instances with Numba.
+
+    Strings are encoded to integer ids and all instances are scored by a
+    parallel JIT kernel. Produces the same dicts as the pure-Python path; worth
+    the one-off compile cost only for large result files.
+    """
+    files = _score_batch(
+        [r.gold_files_set for r in results],
+        [len(r.gold_files) for r in results],
+        [r.normalized_retrieved_files for r in results],
+        _FILE_KS,
+    )
+    funcs = _score_batch(
+        [r.gold_funcs_set for r in results],
+        [len(r.gold_functions) for r in results],
+        [r.retrieved_functions for r in results],
+        _FUNC_KS,
+    )
+
+    instance_metrics = []
+    for result, f, fn in zip(results, files.tolist(), funcs.tolist()):
+        instance_metrics.append({
+            "instance_id": result.instance_id,
+            "gold_files": result.gold_files,
+            "gold_functions": result.gold_functions,
+            "retrieved_files": result.retrieved_files,
+            "retrieved_functions": result.retrieved_functions,
+            "file_recall_at_1": f[0],
+            "file_recall_at_5": f[1],
+            "file_recall_at_10": f[2],
+            "file_recall_at_20": f[3],
+            "function_recall_at_5": fn[0],
+            "function_recall_at_10": fn[1],
+            "file_mrr": f[4],
+            "function_mrr": fn[2],
+            "first_gold_file_rank": int(f[5]),
+        })
+    return instance_metrics
+
+
+_AGGREGATE_FIELDS = (
+    "file_recall_at_1",
+    "file_recall_at_5",
+    "file_recall_at_10",
+    "file_recall_at_20",
+    "function_recall_at_5",
+    "function_recall_at_10",
+    "file_mrr",
+    "function_mrr",
+)
+
+
+# Above this many instances the column reductions are done with NumPy
+_NUMPY_MIN_INSTANCES = 1000
+
+
+def _sum_metrics_numpy(instance_metrics: list[dict]) -> tuple[dict[str, float], int, int]:
+    """Column sums, found count and found-rank sum via vectorized reductions."""
+    import numpy as np
+
+    n = len(instance_metrics)
+    table = np.empty((n, len(_AGGREGATE_FIELDS)), dtype=np.float64)
+    ranks = np.empty(n, dtype=np.int64)
+    for i, m in enumerate(instance_metrics):
+        table[i] = [m[name] for name in _AGGREGATE_FIELDS]
+        ranks[i] = m["first_gold_file_rank"]
+
+    col_sums = table.sum(axis=0)
+    found_ranks = ranks[ranks > 0]
+    sums = {name: float(v) for name, v in zip(_AGGREGATE_FIELDS, col_sums)}
+    return sums, int(found_ranks.size), int(found_ranks.sum())
+
+
 def compute_aggregate_metrics(instance_metrics: list[dict]) -> dict:
     """Compute aggregate metrics across all instances."""
     n = len(instance_metrics)
     if n == 0:
         return {}
 
-    def _avg(field: str) -> float:
-        return sum(m[field] for m in instance_metrics) / n
-
-    found = sum(1 for m in instance_metrics if m["first_gold_file_rank"] > 0)
-    ranks_of_found = [m["first_gold_file_rank"] for m in instance_metrics if m["first_gold_file_rank"] > 0]
+    if n >= _NUMPY_MIN_INSTANCES:
+        sums, found, rank_sum = _sum_metrics_numpy(instance_metrics)
+    else:
+        # Accumulate every field in one pass over the instances
+        sums = dict.fromkeys(_AGGREGATE_FIELDS, 0.0)
+        found = 0
+        rank_sum = 0
+        for m in instance_metrics:
+            for name in _AGGREGATE_FIELDS:
+                sums[name] += m[name]
+            rank = m["first_gold_file_rank"]
+            if rank > 0:
+                found += 1
+                rank_sum += rank
+
+    def _avg(name: str) -> float:
+        return sums[name] / n
 
     return {
         "num_instances": n,
@@ -174,38 +440,45 @@ def compute_aggregate_metrics(instance_metrics: list[dict]) -> dict:
         "file_mrr": round(_avg("file_mrr"), 3),
         "function_mrr": round(_avg("function_mrr"), 3),
         "pct_gold_file_found": round(found / n * 100, 1),
-        "avg_first_gold_file_rank": round(
-            sum(ranks_of_found) / len(ranks_of_found) if ranks_of_found else 0.0, 2
-        ),
+        "avg_first_gold_file_rank": round(rank_sum / found if found else 0.0, 2),
     }
 
 
 def main():
     if len(sys.argv) < 3:
-        print("Usage: python eval/ace_tool_eval.py compute-metrics <results.json>")
+        print("Usage: python eval/ace_tool_eval.py compute-metrics <results.json> [--fast]")
         sys.exit(1)
 
     command = sys.argv[1]
     results_file = sys.argv[2]
+    fast = "--fast" in sys.argv[3:]
 
     if command == "compute-metrics":
-        with open(results_file) as f:
-            data = json.load(f)
+        data = _loads(Path(results_file).read_bytes())
 
-        instance_metrics = []
-        for entry in data["instances"]:
-            result = AceToolInstanceResult(
+        # Paths and names repeat heavily across instances; interning shares
+        # one str object per distinct value and speeds up set lookups
+        intern = sys.intern
+        results = [
+            AceToolInstanceResult(
                 instance_id=entry["instance_id"],
-                gold_files=entry["gold_files"],
-                gold_functions=entry["gold_functions"],
-                retrieved_files=entry["retrieved_files"],
-                retrieved_functions=entry["retrieved_functions"],
+                gold_files=[intern(s) for s in entry["gold_files"]],
+                gold_functions=[intern(s) for s in entry["gold_functions"]],
+                retrieved_files=[intern(s) for s in entry["retrieved_files"]],
+                retrieved_functions=[intern(s) for s in entry["retrieved_functions"]],
             )
-            metrics = compute_instance_metrics(result)
-            instance_metrics.append(metrics)
+            for entry in data["instances"]
+        ]
+        if fast:
+            instance_metrics = compute_instance_metrics_fast(results)
+        else:
+            instance_metrics = [compute_instance_metrics(r) for r in results]
 
-            gf_short = [Path(f).name for f in result.gold_files]
-            print(
+        # Per-instance lines are buffered and written in one call
+        out_lines: list[str] = []
+        for result, metrics in zip(results, instance_metrics):
+            gf_short = [_basename(f) for f in result.gold_files]
+            out_lines.append(
                 f"{metrics['instance_id']:40s} | "
                 f"rank={metrics['first_gold_file_rank']:2d} | "
                 f"R@1={metrics['file_recall_at_1']:.0%} | "
@@ -215,6 +488,8 @@ def main():
                 f"MRR={metrics['file_mrr']:.3f} | "
                 f"gold={gf_short}"
             )
+        if out_lines:
+            sys.stdout.write("\n".join(out_lines) + "\n")
 
         agg = compute_aggregate_metrics(instance_metrics)
         print("\n=== Aggregate ===")
@@ -227,8 +502,7 @@ def main():
             "instances": instance_metrics,
         }
         out_path = Path(results_file).with_suffix(".metrics.json")
-        with open(out_path, "w") as f:
-            json.dump(output, f, indent=2)
+        out_path.write_bytes(_dumps(output))
         print(f"\nMetrics saved to {out_path}")
 
     else:
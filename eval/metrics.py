@@ -0,0 +1,42 @@
+"""Shared ranking metrics for retrieval evaluation."""
+
+from __future__ import annotations
+
+
+def compute_all(
+    gold: list[str],
+    retrieved: list[str],
+    ks: tuple[int, ...] = (1, 5, 10, 20),
+) -> dict:
+    """Compute recall@k for every k, MRR and first-hit rank in one pass.
+
+    Recall@k is the fraction of gold items in the top-k retrieved items
+    (1.0 when there is no gold); MRR is 1/rank of the first gold hit.
+    ``retrieved`` is walked only once and ``gold`` hashed only once.
+
+    Returns:
+        Dict with ``recall_at_{k}`` for each k, ``mrr`` and ``first_rank``
+        (1-based, 0 if no gold item was retrieved).
+    """
+    gold_set = set(gold)
+
+    # Rank at which each gold item first appears.
+    hit_rank: dict[str, int] = {}
+    if gold_set:
+        for i, item in enumerate(retrieved, start=1):
+            if item in gold_set and item not in hit_rank:
+                hit_rank[item] = i
+                if len(hit_rank) == len(gold_set):
+                    break
+
+    first_rank = min(hit_rank.values()) if hit_rank else 0
+    metrics: dict = {}
+    for k in ks:
+        if not gold:
+            metrics[f"recall_at_{k}"] = 1.0  # vacuously true
+        else:
+            hits = sum(1 for g in gold if hit_rank.get(g, k + 1) <= k)
+            metrics[f"recall_at_{k}"] = hits / len(gold)
+    metrics["mrr"] = 1.0 / first_rank if first_rank else 0.0
+    metrics["first_rank"] = first_rank
+    return metrics
@@ -19,30 +19,56 @@ from __future__ import annotations
 
 import argparse
 import asyncio
+import atexit
 import json
 import logging
+import os
 import sys
+import threading
 import time
+from concurrent.futures import (
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
 from dataclasses import asdict, dataclass, field
+from operator import attrgetter
 from pathlib import Path
 from typing import Optional
 
+try:  # orjson is optional; its encoder is much faster on large result files
+    import orjson
+
+    _loads = orjson.loads
+
+    def _dumps_line(obj: object) -> bytes:
+        return orjson.dumps(obj) + b"\n"
+
+    def _dumps(obj: object) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+
+except ImportError:
+    _loads = json.loads
+
+    def _dumps_line(obj: object) -> bytes:
+        return (json.dumps(obj, ensure_ascii=False) + "\n").encode()
+
+    def _dumps(obj: object) -> bytes:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode()
+
 # Ensure project root is on sys.path
 _PROJECT_ROOT = str(Path(__file__).resolve().parent.parent)
 if _PROJECT_ROOT not in sys.path:
     sys.path.insert(0, _PROJECT_ROOT)
 
 from eval.ace_tool_eval import parse_ace_tool_output
-from eval.swebench.context_retrieval import _dedupe_by_symbol_id, generate_queries
+from eval.metrics import compute_all
+from eval.swebench.context_retrieval import generate_queries
 from eval.swebench.dataset import load_dataset
 from eval.swebench.repo_manager import clone_or_reuse, strip_non_source_files
-from eval.swebench.retrieval_eval import (
-    GoldInfo,
-    _first_rank,
-    _mrr,
-    _recall_at_k,
-    extract_gold_from_patch,
-)
+from eval.swebench.retrieval_eval import GoldInfo, extract_gold_from_patch
 from openace.search_utils import _aggregate_by_file, _apply_file_score_gap
 
 logger = logging.getLogger(__name__)
@@ -104,6 +130,22 @@ class ComparisonRow:
 # ---------------------------------------------------------------------------
 
 
+_FUNCTION_KINDS = frozenset(("function", "method"))
+
+# Event loop reused by every run_openace call on a thread.  asyncio.run
+# would build a new loop and default thread pool per instance and tear
+# them down again.
+_LOOPS = threading.local()
+
+
+def _shared_loop() -> asyncio.AbstractEventLoop:
+    loop = getattr(_LOOPS, "loop", None)
+    if loop is None or loop.is_closed():
+        loop = asyncio.new_event_loop()
+        _LOOPS.loop = loop
+    return loop
+
+
 def run_openace(
     project_root: str,
     query: str,
@@ -115,10 +157,13 @@ def run_openace(
     search_limit: int = 20,
     query_mode: str = "multi",
     problem_statement: str = "",
+    search_concurrency: int = 5,
 ) -> EngineResult:
     """Index repo with OpenACE and retrieve files.
 
     Uses the same MCP-style aggregation as retrieval_eval.py for consistency.
+    Generated queries are searched concurrently, at most
+    ``search_concurrency`` at a time.
     """
     from openace.engine import Engine
 
@@ -161,16 +206,50 @@ def run_openace(
 
     t1 = time.monotonic()
 
-    all_results = []
-    for q in queries:
+    # Embed every generated query in one provider call; each search then
+    # reuses its precomputed vector instead of paying a round-trip.
+    query_vectors: list = [None] * len(queries)
+    if query_mode == "multi" and len(queries) > 1:
         try:
-            pool_size = min(search_limit * 5, 200)
-            results = engine.search(q, limit=pool_size, dedupe_by_file=False)
-            all_results.extend(results)
+            query_vectors = engine.embed_queries(queries)
         except Exception:
-            logger.warning("OpenACE search failed for query: %s", q, exc_info=True)
+            logger.warning("Batched query embedding failed, embedding per query", exc_info=True)
+
+    pool_size = min(search_limit * 5, 200)
+    sem = asyncio.Semaphore(max(1, search_concurrency))
+
+    async def _search_one(q: str, vec: Optional[list[float]]) -> list:
+        async with sem:
+            try:
+                return await asyncio.to_thread(
+                    engine.search,
+                    q, limit=pool_size, dedupe_by_file=False, query_vector=vec,
+                )
+            except Exception as exc:
+                # Tracebacks only at debug level; a flaky backend can fail
+                # every query of every instance.
+                logger.warning(
+                    "OpenACE search failed for query %r: %s", q, exc,
+                    exc_info=logger.isEnabledFor(logging.DEBUG),
+                )
+                return []
+
+    async def _run_all() -> list[list]:
+        return await asyncio.gather(
+            *(_search_one(q, vec) for q, vec in zip(queries, query_vectors))
+        )
 
-    unique_results = _dedupe_by_symbol_id(all_results)
+    # Dedupe as each query's results are merged rather than concatenating
+    # every pool first; keeps the highest-scoring hit per symbol, exactly
+    # like _dedupe_by_symbol_id.
+    best: dict[str, object] = {}
+    for results in _shared_loop().run_until_complete(_run_all()):
+        for r in results:
+            existing = best.get(r.symbol_id)
+            if existing is None or r.score > existing.score:
+                best[r.symbol_id] = r
+
+    unique_results = sorted(best.values(), key=lambda r: r.score, reverse=True)
     search_time = time.monotonic() - t1
 
     # MCP-style aggregation
@@ -180,13 +259,13 @@ def run_openace(
 
     retrieved_files = [g["file_path"] for g in file_groups]
 
-    retrieved_functions: list[str] = []
-    seen_funcs: set[str] = set()
-    for group in file_groups:
-        for r in group["symbols"]:
-            if r.kind in ("function", "method") and r.name not in seen_funcs:
-                seen_funcs.add(r.name)
-                retrieved_functions.append(r.name)
+    # Ordered dedupe of function names via dict.fromkeys
+    retrieved_functions = list(dict.fromkeys(
+        r.name
+        for group in file_groups
+        for r in group["symbols"]
+        if r.kind in _FUNCTION_KINDS
+    ))
 
     return EngineResult(
         retrieved_files=retrieved_files,
@@ -202,29 +281,143 @@ def run_openace(
 # ---------------------------------------------------------------------------
 
 
-async def _call_ace_search(
-    project_path: str,
-    query: str,
-    *,
-    ace_command: str = "ace-tool",
-    ace_args: Optional[list[str]] = None,
-) -> str:
-    """Call ace-tool search_context via MCP stdio client."""
-    from mcp import ClientSession
-    from mcp.client.stdio import StdioServerParameters, stdio_client
-
-    server = StdioServerParameters(
-        command=ace_command,
-        args=ace_args or [],
-    )
-    async with stdio_client(server) as (read, write):
-        async with ClientSession(read_stream=read, write_stream=write) as session:
-            await session.initialize()
-            result = await session.call_tool(
+class AceToolClient:
+    """Persistent ace-tool MCP session reused across searches.
+
+    Spawning ace-tool and running the MCP handshake once per instance
+    dominates short searches, so the session is opened on first use and
+    kept for the life of the process.  The stdio transport must be closed
+    by the task that opened it, so the session lives in one long-running
+    task on a private event-loop thread and :meth:`search` submits calls
+    to that loop.
+    """
+
+    def __init__(
+        self,
+        ace_command: str = "ace-tool",
+        ace_args: Optional[list[str]] = None,
+        *,
+        timeout: float = 300.0,
+    ) -> None:
+        self._command = ace_command
+        self._args = list(ace_args or [])
+        self._timeout = timeout
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._holder: Optional[Future] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._session = None
+
+    def __enter__(self) -> AceToolClient:
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def start(self) -> None:
+        """Spawn ace-tool and complete the MCP handshake (idempotent)."""
+        if self._loop is not None:
+            return
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(
+            target=loop.run_forever, name="ace-tool-mcp", daemon=True,
+        )
+        thread.start()
+        self._loop, self._thread = loop, thread
+        ready: Future = Future()
+        self._holder = asyncio.run_coroutine_threadsafe(self._hold(ready), loop)
+        try:
+            ready.result(timeout=self._timeout)
+        except BaseException:
+            self.close()
+            raise
+
+    async def _hold(self, ready: Future) -> None:
+        from mcp import ClientSession
+        from mcp.client.stdio import StdioServerParameters, stdio_client
+
+        self._stop = asyncio.Event()
+        server = StdioServerParameters(command=self._command, args=self._args)
+        try:
+            async with stdio_client(server) as (read, write):
+                async with ClientSession(read_stream=read, write_stream=write) as session:
+                    await session.initialize()
+                    self._session = session
+                    ready.set_result(None)
+                    await self._stop.wait()
+        except BaseException as exc:
+            if not ready.done():
+                ready.set_exception(exc)
+            raise
+        finally:
+            self._session = None
+
+    async def _search(self, project_path: str, query: str) -> str:
+        if self._session is None:
+            raise RuntimeError("ace-tool session is not open")
+        result = await asyncio.wait_for(
+            self._session.call_tool(
                 "search_context",
                 {"project_root_path": project_path, "query": query},
-            )
-            return result.content[0].text if result.content else ""
+            ),
+            timeout=self._timeout,
+        )
+        return result.content[0].text if result.content else ""
+
+    def search(self, project_path: str, query: str) -> str:
+        """Call ace-tool ``search_context`` and return its raw text output."""
+        self.start()
+        return asyncio.run_coroutine_threadsafe(
+            self._search(project_path, query), self._loop,
+        ).result()
+
+    def close(self) -> None:
+        """Shut down the session, the ace-tool subprocess and the loop."""
+        loop = self._loop
+        if loop is None:
+            return
+        if self._stop is not None:
+            loop.call_soon_threadsafe(self._stop.set)
+        if self._holder is not None:
+            try:
+                self._holder.result(timeout=10)
+            except BaseException:
+                self._holder.cancel()
+        loop.call_soon_threadsafe(loop.stop)
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+        if not loop.is_running():
+            loop.close()
+        self._loop = self._thread = self._holder = self._stop = None
+
+
+# One client per (command, args) per process; worker processes each keep
+# their own session for the whole run.
+_ACE_CLIENTS: dict[tuple, AceToolClient] = {}
+
+
+def _shared_ace_client(
+    ace_command: str, ace_args: Optional[list[str]],
+) -> AceToolClient:
+    key = (ace_command, tuple(ace_args or ()))
+    client = _ACE_CLIENTS.get(key)
+    if client is None:
+        client = AceToolClient(ace_command, ace_args)
+        _ACE_CLIENTS[key] = client
+    return client
+
+
+def _drop_ace_client(ace_command: str, ace_args: Optional[list[str]]) -> None:
+    client = _ACE_CLIENTS.pop((ace_command, tuple(ace_args or ())), None)
+    if client is not None:
+        client.close()
+
+
+@atexit.register
+def _close_ace_clients() -> None:
+    while _ACE_CLIENTS:
+        _ACE_CLIENTS.popitem()[1].close()
 
 
 def run_ace_tool(
@@ -234,18 +427,20 @@ def run_ace_tool(
     ace_command: str = "ace-tool",
     ace_args: Optional[list[str]] = None,
 ) -> EngineResult:
-    """Run ace-tool search and parse results."""
+    """Run ace-tool search and parse results.
+
+    Uses the process-wide persistent session for ``ace_command``; a failed
+    call discards that session so the next instance starts a fresh one.
+    """
     t0 = time.monotonic()
     try:
-        raw_output = asyncio.run(
-            _call_ace_search(
-                project_path, query,
-                ace_command=ace_command, ace_args=ace_args,
-            )
+        raw_output = _shared_ace_client(ace_command, ace_args).search(
+            project_path, query,
         )
     except Exception as exc:
         elapsed = time.monotonic() - t0
         logger.error("ace-tool failed: %s", exc, exc_info=True)
+        _drop_ace_client(ace_command, ace_args)
         return EngineResult(
             retrieved_files=[],
             retrieved_functions=[],
@@ -280,17 +475,29 @@ def compare_instance(
     query_mode: str = "multi",
     ace_command: str = "ace-tool",
     ace_args: Optional[list[str]] = None,
+    search_concurrency: int = 5,
 ) -> ComparisonRow:
     """Run both engines on a single instance and compute comparison metrics."""
-    query = instance.problem_statement[:500]
+    statement = instance.problem_statement
+    query = statement[:500]
+    display_query = statement[:100] + "..." if len(statement) > 100 else statement
 
     row = ComparisonRow(
         instance_id=instance.instance_id,
-        query=query[:100] + "..." if len(query) > 100 else query,
+        query=display_query,
         gold_files=gold.files,
         gold_functions=gold.functions,
     )
 
+    # ace-tool only needs the checkout, so it runs in the background while
+    # OpenACE indexes and searches; wall-clock is max(OpenACE, ace-tool).
+    ace_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ace-tool")
+    at_future = ace_pool.submit(
+        run_ace_tool, project_root, query,
+        ace_command=ace_command, ace_args=ace_args,
+    )
+    ace_pool.shutdown(wait=False)
+
     # --- OpenACE ---
     try:
         oa = run_openace(
@@ -302,15 +509,18 @@ def compare_instance(
             reranker_kwargs=reranker_kwargs,
             search_limit=search_limit,
             query_mode=query_mode,
-            problem_statement=instance.problem_statement,
+            problem_statement=statement,
+            search_concurrency=search_concurrency,
         )
         row.oa_retrieved_files = oa.retrieved_files
-        row.oa_file_recall_at_1 = _recall_at_k(gold.files, oa.retrieved_files, 1)
-        row.oa_file_recall_at_5 = _recall_at_k(gold.files, oa.retrieved_files, 5)
-        row.oa_file_recall_at_10 = _recall_at_k(gold.files, oa.retrieved_files, 10)
-        row.oa_file_recall_at_20 = _recall_at_k(gold.files, oa.retrieved_files, 20)
-        row.oa_file_mrr = _mrr(gold.files, oa.retrieved_files)
-        row.oa_first_rank = _first_rank(gold.files, oa.retrieved_files)
+        if oa.retrieved_files:  # nothing retrieved: metrics stay zero
+            m = compute_all(gold.files, oa.retrieved_files)
+            row.oa_file_recall_at_1 = m["recall_at_1"]
+            row.oa_file_recall_at_5 = m["recall_at_5"]
+            row.oa_file_recall_at_10 = m["recall_at_10"]
+            row.oa_file_recall_at_20 = m["recall_at_20"]
+            row.oa_file_mrr = m["mrr"]
+            row.oa_first_rank = m["first_rank"]
         row.oa_index_time = oa.index_time_secs or 0.0
         row.oa_search_time = oa.search_time_secs or 0.0
         row.oa_error = oa.error
@@ -320,17 +530,16 @@ def compare_instance(
 
     # --- ace-tool ---
     try:
-        at = run_ace_tool(
-            project_root, query,
-            ace_command=ace_command, ace_args=ace_args,
-        )
+        at = at_future.result()
         row.at_retrieved_files = at.retrieved_files
-        row.at_file_recall_at_1 = _recall_at_k(gold.files, at.retrieved_files, 1)
-        row.at_file_recall_at_5 = _recall_at_k(gold.files, at.retrieved_files, 5)
-        row.at_file_recall_at_10 = _recall_at_k(gold.files, at.retrieved_files, 10)
-        row.at_file_recall_at_20 = _recall_at_k(gold.files, at.retrieved_files, 20)
-        row.at_file_mrr = _mrr(gold.files, at.retrieved_files)
-        row.at_first_rank = _first_rank(gold.files, at.retrieved_files)
+        if at.retrieved_files:  # nothing retrieved: metrics stay zero
+            m = compute_all(gold.files, at.retrieved_files)
+            row.at_file_recall_at_1 = m["recall_at_1"]
+            row.at_file_recall_at_5 = m["recall_at_5"]
+            row.at_file_recall_at_10 = m["recall_at_10"]
+            row.at_file_recall_at_20 = m["recall_at_20"]
+            row.at_file_mrr = m["mrr"]
+            row.at_first_rank = m["first_rank"]
         row.at_elapsed = at.elapsed_secs
         row.at_error = at.error
     except Exception as exc:
@@ -340,49 +549,108 @@ def compare_instance(
     return row
 
 
+def _evaluate_one(
+    instance,
+    gold: GoldInfo,
+    project_root: str,
+    engine_cfg: dict,
+) -> ComparisonRow:
+    """Process-pool entry point: compare both engines on one prepared repo."""
+    return compare_instance(instance, project_root, gold, **engine_cfg)
+
+
 # ---------------------------------------------------------------------------
 # Aggregate reporting
 # ---------------------------------------------------------------------------
 
 
+# Per-row fields averaged by _aggregate
+_AVG_FIELDS = (
+    "oa_file_recall_at_1", "oa_file_recall_at_5", "oa_file_recall_at_10",
+    "oa_file_recall_at_20", "oa_file_mrr", "oa_index_time", "oa_search_time",
+    "at_file_recall_at_1", "at_file_recall_at_5", "at_file_recall_at_10",
+    "at_file_recall_at_20", "at_file_mrr", "at_elapsed",
+)
+
+# Below this many rows the plain Python reduction is faster than building
+# NumPy arrays (full SWE-bench is ~2.3k instances).
+_NUMPY_MIN_ROWS = 1000
+
+_avg_getter = attrgetter(*_AVG_FIELDS)
+_rank_getter = attrgetter("oa_first_rank", "at_first_rank")
+
+
+def _sum_rows_numpy(
+    rows: list[ComparisonRow],
+) -> tuple[dict[str, float], int, int, int, int]:
+    """Column sums plus found counts and found-rank sums via vectorized reductions."""
+    import numpy as np
+
+    table = np.array([_avg_getter(r) for r in rows], dtype=np.float64)
+    ranks = np.array([_rank_getter(r) for r in rows], dtype=np.int64)
+
+    col_sums = table.sum(axis=0)
+    found = ranks > 0
+    totals = {name: float(v) for name, v in zip(_AVG_FIELDS, col_sums)}
+    oa_found, at_found = (int(c) for c in found.sum(axis=0))
+    oa_rank_sum, at_rank_sum = (int(c) for c in (ranks * found).sum(axis=0))
+    return totals, oa_found, oa_rank_sum, at_found, at_rank_sum
+
+
 def _aggregate(rows: list[ComparisonRow]) -> dict:
     """Compute aggregate metrics for both engines."""
     n = len(rows)
     if n == 0:
         return {}
 
-    def _avg(getter) -> float:
-        return sum(getter(r) for r in rows) / n
-
-    oa_found = sum(1 for r in rows if r.oa_first_rank > 0)
-    at_found = sum(1 for r in rows if r.at_first_rank > 0)
-    oa_ranks = [r.oa_first_rank for r in rows if r.oa_first_rank > 0]
-    at_ranks = [r.at_first_rank for r in rows if r.at_first_rank > 0]
+    if n >= _NUMPY_MIN_ROWS:
+        totals, oa_found, oa_rank_sum, at_found, at_rank_sum = _sum_rows_numpy(rows)
+        oa_errors = sum(1 for r in rows if r.oa_error)
+        at_errors = sum(1 for r in rows if r.at_error)
+    else:
+        # One pass over rows accumulates every average, count and rank sum.
+        totals = dict.fromkeys(_AVG_FIELDS, 0.0)
+        oa_found = at_found = oa_rank_sum = at_rank_sum = 0
+        oa_errors = at_errors = 0
+        for r in rows:
+            for name in _AVG_FIELDS:
+                totals[name] += getattr(r, name)
+            if r.oa_first_rank > 0:
+                oa_found += 1
+                oa_rank_sum += r.oa_first_rank
+            if r.at_first_rank > 0:
+                at_found += 1
+                at_rank_sum += r.at_first_rank
+            if r.oa_error:
+                oa_errors += 1
+            if r.at_error:
+                at_errors += 1
+    avg = {name: total / n for name, total in totals.items()}
 
     return {
         "num_instances": n,
         "openace": {
-            "file_recall_at_1": round(_avg(lambda r: r.oa_file_recall_at_1) * 100, 1),
-            "file_recall_at_5": round(_avg(lambda r: r.oa_file_recall_at_5) * 100, 1),
-            "file_recall_at_10": round(_avg(lambda r: r.oa_file_recall_at_10) * 100, 1),
-            "file_recall_at_20": round(_avg(lambda r: r.oa_file_recall_at_20) * 100, 1),
-            "file_mrr": round(_avg(lambda r: r.oa_file_mrr), 3),
+            "file_recall_at_1": round(avg["oa_file_recall_at_1"] * 100, 1),
+            "file_recall_at_5": round(avg["oa_file_recall_at_5"] * 100, 1),
+            "file_recall_at_10": round(avg["oa_file_recall_at_10"] * 100, 1),
+            "file_recall_at_20": round(avg["oa_file_recall_at_20"] * 100, 1),
+            "file_mrr": round(avg["oa_file_mrr"], 3),
             "pct_found": round(oa_found / n * 100, 1),
-            "avg_rank": round(sum(oa_ranks) / len(oa_ranks), 2) if oa_ranks else 0.0,
-            "avg_index_time": round(_avg(lambda r: r.oa_index_time), 2),
-            "avg_search_time": round(_avg(lambda r: r.oa_search_time), 4),
-            "errors": sum(1 for r in rows if r.oa_error),
+            "avg_rank": round(oa_rank_sum / oa_found, 2) if oa_found else 0.0,
+            "avg_index_time": round(avg["oa_index_time"], 2),
+            "avg_search_time": round(avg["oa_search_time"], 4),
+            "errors": oa_errors,
         },
         "ace_tool": {
-            "file_recall_at_1": round(_avg(lambda r: r.at_file_recall_at_1) * 100, 1),
-            "file_recall_at_5": round(_avg(lambda r: r.at_file_recall_at_5) * 100, 1),
-            "file_recall_at_10": round(_avg(lambda r: r.at_file_recall_at_10) * 100, 1),
-            "file_recall_at_20": round(_avg(lambda r: r.at_file_recall_at_20) * 100, 1),
-            "file_mrr": round(_avg(lambda r: r.at_file_mrr), 3),
+            "file_recall_at_1": round(avg["at_file_recall_at_1"] * 100, 1),
+            "file_recall_at_5": round(avg["at_file_recall_at_5"] * 100, 1),
+            "file_recall_at_10": round(avg["at_file_recall_at_10"] * 100, 1),
+            "file_recall_at_20": round(avg["at_file_recall_at_20"] * 100, 1),
+            "file_mrr": round(avg["at_file_mrr"], 3),
             "pct_found": round(at_found / n * 100, 1),
-            "avg_rank": round(sum(at_ranks) / len(at_ranks), 2) if at_ranks else 0.0,
-            "avg_elapsed": round(_avg(lambda r: r.at_elapsed), 2),
-            "errors": sum(1 for r in rows if r.at_error),
+            "avg_rank": round(at_rank_sum / at_found, 2) if at_found else 0.0,
+            "avg_elapsed": round(avg["at_elapsed"], 2),
+            "errors": at_errors,
         },
     }
 
@@ -460,8 +728,15 @@ def run_comparison(
     ace_command: str = "ace-tool",
     ace_base_url: Optional[str] = None,
     ace_token: Optional[str] = None,
+    jobs: int = 1,
+    search_concurrency: int = 5,
 ) -> dict:
-    """Run side-by-side comparison of OpenACE and ace-tool."""
+    """Run side-by-side comparison of OpenACE and ace-tool.
+
+    ``jobs`` bounds the number of worker processes evaluating instances
+    concurrently; ``search_concurrency`` bounds in-flight OpenACE queries
+    within each instance.
+    """
     embedding_kwargs: dict = {}
     if embedding_base_url:
         embedding_kwargs["base_url"] = embedding_base_url
@@ -504,73 +779,144 @@ def run_comparison(
     out_path = Path(output_dir)
     out_path.mkdir(parents=True, exist_ok=True)
 
-    # Resume from checkpoint if it exists
+    # Resume from checkpoint if it exists.  Rows are appended to rows.jsonl
+    # as they finish; comparison_results.json is only written at the end
+    # (older runs checkpointed there, so fall back to it).
+    # row_dicts holds each row's serialized form, built once per row and
+    # reused for the checkpoint line and the final results file.
     rows: list[ComparisonRow] = []
+    row_dicts: list[dict] = []
     done_ids: set[str] = set()
-    checkpoint_file = out_path / "comparison_results.json"
-    if checkpoint_file.exists():
-        try:
-            prev = json.loads(checkpoint_file.read_text())
+    rows_file = out_path / "rows.jsonl"
+    legacy_file = out_path / "comparison_results.json"
+    try:
+        rewrite = False
+        if rows_file.exists():
+            with rows_file.open("rb") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        inst_data = _loads(line)
+                    except json.JSONDecodeError:
+                        # Torn final line from an interrupted run
+                        logger.warning("Skipping malformed checkpoint line")
+                        rewrite = True
+                        continue
+                    rows.append(ComparisonRow(**inst_data))
+                    row_dicts.append(inst_data)
+                    done_ids.add(inst_data["instance_id"])
+        elif legacy_file.exists():
+            prev = _loads(legacy_file.read_bytes())
             for inst_data in prev.get("instances", []):
                 rows.append(ComparisonRow(**inst_data))
+                row_dicts.append(inst_data)
                 done_ids.add(inst_data["instance_id"])
-            if done_ids:
-                logger.info("Resumed %d instances from checkpoint", len(done_ids))
-        except Exception as exc:
-            logger.warning("Failed to load checkpoint, starting fresh: %s", exc)
-            rows = []
-            done_ids = set()
-
-    for i, inst in enumerate(instances):
-        if inst.instance_id in done_ids:
-            logger.info("Skipping %s (already in checkpoint)", inst.instance_id)
-            continue
-
-        gold = extract_gold_from_patch(inst.patch)
-        if not gold.files:
-            logger.warning(
-                "No gold files from patch for %s, skipping", inst.instance_id,
-            )
-            continue
-
-        print(f"\n[{i + 1}/{len(instances)}] {inst.instance_id}")
-        print(f"  Gold files: {gold.files}")
-
-        try:
-            repo_path = clone_or_reuse(inst.repo, inst.base_commit, repos_dir)
-        except Exception as exc:
-            logger.error("Repo clone failed for %s: %s", inst.instance_id, exc)
-            continue
-
-        strip_non_source_files(repo_path)
-
-        row = compare_instance(
-            inst,
-            str(repo_path),
-            gold,
-            embedding_backend=embedding,
-            reranker_backend=reranker,
-            embedding_kwargs=embedding_kwargs or None,
-            reranker_kwargs=reranker_kwargs or None,
-            search_limit=search_limit,
-            query_mode=query_mode,
-            ace_command=ace_command,
-            ace_args=ace_args or None,
-        )
-        rows.append(row)
-
-        # Print per-instance results
-        _print_instance(row)
+            rewrite = True
+        if rewrite:
+            with rows_file.open("wb") as f:
+                for row_dict in row_dicts:
+                    f.write(_dumps_line(row_dict))
+        if done_ids:
+            logger.info("Resumed %d instances from checkpoint", len(done_ids))
+    except Exception as exc:
+        logger.warning("Failed to load checkpoint, starting fresh: %s", exc)
+        rows = []
+        row_dicts = []
+        done_ids = set()
+        rows_file.unlink(missing_ok=True)
+
+    engine_cfg = {
+        "embedding_backend": embedding,
+        "reranker_backend": reranker,
+        "embedding_kwargs": embedding_kwargs or None,
+        "reranker_kwargs": reranker_kwargs or None,
+        "search_limit": search_limit,
+        "query_mode": query_mode,
+        "ace_command": ace_command,
+        "ace_args": ace_args or None,
+        "search_concurrency": search_concurrency,
+    }
 
-        # Save checkpoint after each instance
-        _save_results(out_path, rows)
+    # Instances are independent: clone/strip serially in this process (so a
+    # repo is never cloned twice concurrently), then fan the indexing and
+    # both searches out to a bounded pool of worker processes.  Finished
+    # workers are drained between submissions so each row is printed and
+    # checkpointed as soon as it arrives, not after the whole clone phase.
+    with (
+        ProcessPoolExecutor(max_workers=max(1, jobs)) as executor,
+        rows_file.open("ab") as checkpoint,
+    ):
+        pending: dict[Future, str] = {}
+        in_flight: dict[str, Future] = {}
+
+        def _collect(future: Future) -> None:
+            iid = pending.pop(future)
+            try:
+                row = future.result()
+            except Exception:
+                logger.error("Comparison worker failed for %s", iid, exc_info=True)
+                return
+            row_dict = asdict(row)
+            rows.append(row)
+            row_dicts.append(row_dict)
+
+            # Print per-instance results
+            print(f"\n{row.instance_id}")
+            _print_instance(row)
+
+            # Append checkpoint after each instance
+            checkpoint.write(_dumps_line(row_dict))
+            checkpoint.flush()
+
+        def _drain_done() -> None:
+            for future in [f for f in pending if f.done()]:
+                _collect(future)
+
+        for i, inst in enumerate(instances):
+            _drain_done()
+            if inst.instance_id in done_ids:
+                logger.info("Skipping %s (already in checkpoint)", inst.instance_id)
+                continue
+
+            gold = extract_gold_from_patch(inst.patch)
+            if not gold.files:
+                logger.warning(
+                    "No gold files from patch for %s, skipping", inst.instance_id,
+                )
+                continue
+
+            print(f"\n[{i + 1}/{len(instances)}] {inst.instance_id}")
+            print(f"  Gold files: {gold.files}")
+
+            try:
+                repo_path = clone_or_reuse(inst.repo, inst.base_commit, repos_dir)
+            except Exception as exc:
+                logger.error("Repo clone failed for %s: %s", inst.instance_id, exc)
+                continue
+
+            strip_non_source_files(repo_path, inst.base_commit)
+
+            # Instances at the same commit share a checkout (and its .openace
+            # index), so never hand one directory to two workers at once.
+            busy = in_flight.get(str(repo_path))
+            if busy is not None:
+                wait([busy])
+                _drain_done()
+
+            future = executor.submit(_evaluate_one, inst, gold, str(repo_path), engine_cfg)
+            pending[future] = inst.instance_id
+            in_flight[str(repo_path)] = future
+
+        for future in as_completed(list(pending)):
+            _collect(future)
 
     # Aggregate and print
     agg = _aggregate(rows)
     _print_comparison_table(agg)
 
     # Save final results
-    _save_results(out_path, rows, agg)
+    _save_results(out_path, row_dicts, agg)
 
     return agg
 
@@ -592,18 +938,21 @@ def _print_instance(row: ComparisonRow) -> None:
 
 def _save_results(
     out_path: Path,
-    rows: list[ComparisonRow],
+    row_dicts: list[dict],
     agg: Optional[dict] = None,
 ) -> None:
-    """Save results to JSON."""
+    """Save results to JSON.
+
+    ``row_dicts`` are the already-serialized rows (``asdict`` output).
+    """
     data = {
-        "instances": [asdict(r) for r in rows],
+        "instances": row_dicts,
     }
     if agg is not None:
         data["aggregate"] = agg
 
     results_file = out_path / "comparison_results.json"
-    results_file.write_text(json.dumps(data, indent=2, ensure_ascii=False))
+    results_file.write_bytes(_dumps(data))
 
 
 # ---------------------------------------------------------------------------
@@ -684,6 +1033,15 @@ def main() -> None:
         "--ace-tool-token", default=None,
         help="ace-tool auth token (required for ace-tool)",
     )
+    parser.add_argument(
+        "--jobs", "-j", type=int, default=min(8, os.cpu_count() or 1),
+        help="Instances evaluated in parallel worker processes "
+             "(default: min(8, CPU count))",
+    )
+    parser.add_argument(
+        "--search-concurrency", type=int, default=5,
+        help="Max OpenACE queries in flight per instance (default: 5)",
+    )
     parser.add_argument(
         "--verbose", "-v", action="store_true",
         help="Enable debug logging",
@@ -714,6 +1072,8 @@ def main() -> None:
         ace_command=args.ace_tool_command,
         ace_base_url=args.ace_tool_base_url,
         ace_token=args.ace_tool_token,
+        jobs=args.jobs,
+        search_concurrency=args.search_concurrency,
     )
 
 
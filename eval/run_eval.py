@@ -6,6 +6,7 @@ from __future__ import annotations
 import argparse
 import logging
 import sys
+from dataclasses import replace
 from pathlib import Path
 
 # Ensure the project root is on sys.path so `eval.swebench.*` imports work
@@ -15,185 +16,207 @@ if _PROJECT_ROOT not in sys.path:
     sys.path.insert(0, _PROJECT_ROOT)
 
 
-def main() -> None:
+def _sniff_subcommand(argv: list[str]) -> str | None:
+    """Return the subcommand token if it leads ``argv``, else None."""
+    if argv and not argv[0].startswith("-"):
+        return argv[0]
+    return None
+
+
+def _build_parser(command: str | None = None) -> argparse.ArgumentParser:
+    """Build the CLI parser.
+
+    When ``command`` names a known subcommand only its arguments are
+    registered; otherwise every subcommand is (for top-level ``--help``
+    and usage errors).
+    """
     parser = argparse.ArgumentParser(
         description="Run SWE-bench Lite evaluation with OpenACE context enhancement",
     )
     subparsers = parser.add_subparsers(dest="command", required=True)
+    names = [command] if command in _COMMANDS else list(_COMMANDS)
+    for name in names:
+        help_text, add_args, _ = _COMMANDS[name]
+        add_args(subparsers.add_parser(name, help=help_text))
+    return parser
+
 
-    # --- run ---
-    run_parser = subparsers.add_parser("run", help="Run evaluation")
-    run_parser.add_argument(
+def _add_run_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
         "--config", required=True,
         help="Path to YAML config file",
     )
-    run_parser.add_argument(
+    parser.add_argument(
         "--max-instances", type=int, default=None,
         help="Override max_instances from config",
     )
-    run_parser.add_argument(
+    parser.add_argument(
         "--conditions", type=str, default=None,
         help="Comma-separated condition IDs to run (overrides config)",
     )
-    run_parser.add_argument(
+    parser.add_argument(
         "--verbose", "-v", action="store_true",
         help="Enable debug logging",
     )
 
-    # --- mini (agentic via mini-SWE-agent) ---
-    mini_parser = subparsers.add_parser(
-        "mini", help="Run agentic evaluation via mini-SWE-agent",
-    )
-    mini_parser.add_argument(
+
+def _add_mini_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
         "--model", "-m", required=True,
         help="LiteLLM model name (e.g. anthropic/claude-sonnet-4-5-20250929)",
     )
-    mini_parser.add_argument(
+    parser.add_argument(
         "--conditions", default="baseline,openace",
         help="Comma-separated condition IDs (default: baseline,openace)",
     )
-    mini_parser.add_argument(
+    parser.add_argument(
         "--subset", default="lite",
         help="SWE-bench subset: lite, verified, full (default: lite)",
     )
-    mini_parser.add_argument(
+    parser.add_argument(
         "--split", default="test",
         help="Dataset split (default: test)",
     )
-    mini_parser.add_argument(
+    parser.add_argument(
         "--slice", dest="slice_spec", default="",
         help="Instance slice, e.g. '0:20' for first 20",
     )
-    mini_parser.add_argument(
+    parser.add_argument(
         "--output-dir", "-o", default="eval/output",
         help="Output directory (default: eval/output)",
     )
-    mini_parser.add_argument(
+    parser.add_argument(
         "--repos-dir", default="eval/repos",
         help="Repos cache directory (default: eval/repos)",
     )
-    mini_parser.add_argument(
+    parser.add_argument(
         "--embedding", default=None,
         help="OpenACE embedding backend for openace condition (default: None = BM25 only)",
     )
-    mini_parser.add_argument(
+    parser.add_argument(
         "--reranker", default=None,
         help="OpenACE reranker backend for openace condition",
     )
-    mini_parser.add_argument(
+    parser.add_argument(
         "--step-limit", type=int, default=50,
         help="Max agent steps per instance (default: 50)",
     )
-    mini_parser.add_argument(
+    parser.add_argument(
         "--cost-limit", type=float, default=3.0,
         help="Max cost per instance in USD (default: 3.0)",
     )
-    mini_parser.add_argument(
+    parser.add_argument(
         "--api-base", default=None,
         help="Custom API base URL for OpenAI-compatible services",
     )
-    mini_parser.add_argument(
+    parser.add_argument(
         "--api-key", default=None,
         help="API key (overrides OPENAI_API_KEY env var)",
     )
-    mini_parser.add_argument(
+    parser.add_argument(
+        "--max-concurrency", type=int, default=8,
+        help="Max instances run in parallel per condition (default: 8)",
+    )
+    parser.add_argument(
         "--verbose", "-v", action="store_true",
         help="Enable debug logging",
     )
 
-    # --- retrieval (offline retrieval quality eval) ---
-    ret_parser = subparsers.add_parser(
-        "retrieval", help="Evaluate retrieval quality against gold patches",
-    )
-    ret_parser.add_argument(
+
+def _add_retrieval_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
         "--conditions", default="bm25-only",
         help="Comma-separated condition IDs (default: bm25-only)",
     )
-    ret_parser.add_argument(
+    parser.add_argument(
         "--subset", default="lite",
         help="SWE-bench subset: lite, verified, full (default: lite)",
     )
-    ret_parser.add_argument(
+    parser.add_argument(
         "--split", default="dev",
         help="Dataset split (default: dev)",
     )
-    ret_parser.add_argument(
+    parser.add_argument(
         "--slice", dest="slice_spec", default="",
         help="Instance slice, e.g. '0:10' for first 10",
     )
-    ret_parser.add_argument(
+    parser.add_argument(
         "--output-dir", "-o", default="eval/output_dev_retrieval",
         help="Output directory (default: eval/output_dev_retrieval)",
     )
-    ret_parser.add_argument(
+    parser.add_argument(
         "--repos-dir", default="eval/repos",
         help="Repos cache directory (default: eval/repos)",
     )
-    ret_parser.add_argument(
+    parser.add_argument(
         "--embedding", default=None,
         help="Override embedding backend for non-baseline conditions",
     )
-    ret_parser.add_argument(
+    parser.add_argument(
         "--embedding-base-url", default=None,
         help="Override embedding API base URL",
     )
-    ret_parser.add_argument(
+    parser.add_argument(
         "--embedding-api-key", default=None,
         help="Override embedding API key",
     )
-    ret_parser.add_argument(
+    parser.add_argument(
         "--reranker", default=None,
         help="Override reranker backend for non-baseline conditions",
     )
-    ret_parser.add_argument(
+    parser.add_argument(
         "--reranker-base-url", default=None,
         help="Override reranker API base URL",
     )
-    ret_parser.add_argument(
+    parser.add_argument(
         "--reranker-api-key", default=None,
         help="Override reranker API key",
     )
-    ret_parser.add_argument(
+    parser.add_argument(
         "--limit", type=int, default=20,
         help="Search result limit per query (default: 20)",
     )
-    ret_parser.add_argument(
+    parser.add_argument(
         "--query-mode", default="multi",
         choices=["multi", "single"],
         help="Query mode: 'multi' generates multiple sub-queries, "
              "'single' uses problem_statement[:500] as one query (default: multi)",
     )
-    ret_parser.add_argument(
+    parser.add_argument(
+        "--workers", type=int, default=None,
+        help="Instances evaluated in parallel worker processes "
+             "(default: half the CPU count)",
+    )
+    parser.add_argument(
         "--verbose", "-v", action="store_true",
         help="Enable debug logging",
     )
 
-    # --- analyze ---
-    analyze_parser = subparsers.add_parser("analyze", help="Analyze results")
-    analyze_parser.add_argument(
+
+def _add_analyze_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
         "--output-dir", required=True,
         help="Path to evaluation output directory",
     )
-    analyze_parser.add_argument(
+    parser.add_argument(
         "--conditions", type=str, default=None,
         help="Comma-separated condition IDs to compare",
     )
 
-    args = parser.parse_args()
+
+def main(argv: list[str] | None = None) -> None:
+    if argv is None:
+        argv = sys.argv[1:]
+    # Only the invoked subcommand's arguments are registered.
+    parser = _build_parser(_sniff_subcommand(argv))
+    args = parser.parse_args(argv)
 
     logging.basicConfig(
         level=logging.DEBUG if getattr(args, "verbose", False) else logging.INFO,
         format="%(asctime)s %(levelname)-8s %(name)s — %(message)s",
     )
 
-    if args.command == "run":
-        _cmd_run(args)
-    elif args.command == "mini":
-        _cmd_mini(args)
-    elif args.command == "retrieval":
-        _cmd_retrieval(args)
-    elif args.command == "analyze":
-        _cmd_analyze(args)
+    _COMMANDS[args.command][2](args)
 
 
 def _cmd_run(args) -> None:
@@ -204,16 +227,7 @@ def _cmd_run(args) -> None:
 
     # Apply CLI overrides
     if args.max_instances is not None:
-        # Reconstruct with override (frozen dataclass — rebuild)
-        config = type(config)(
-            dataset=config.dataset,
-            conditions=config.conditions,
-            llm=config.llm,
-            repos_dir=config.repos_dir,
-            output_dir=config.output_dir,
-            max_instances=args.max_instances,
-            instance_ids=config.instance_ids,
-        )
+        config = replace(config, max_instances=args.max_instances)
 
     if args.conditions is not None:
         selected = set(args.conditions.split(","))
@@ -221,15 +235,7 @@ def _cmd_run(args) -> None:
         if not filtered:
             print(f"Error: no matching conditions found for: {args.conditions}")
             sys.exit(1)
-        config = type(config)(
-            dataset=config.dataset,
-            conditions=filtered,
-            llm=config.llm,
-            repos_dir=config.repos_dir,
-            output_dir=config.output_dir,
-            max_instances=config.max_instances,
-            instance_ids=config.instance_ids,
-        )
+        config = replace(config, conditions=filtered)
 
     run_evaluation(config)
 
@@ -251,6 +257,7 @@ def _cmd_mini(args) -> None:
         cost_limit=args.cost_limit,
         api_base=args.api_base,
         api_key=args.api_key,
+        max_concurrency=args.max_concurrency,
     )
 
 
@@ -272,6 +279,7 @@ def _cmd_retrieval(args) -> None:
         reranker_base_url=args.reranker_base_url,
         reranker_api_key=args.reranker_api_key,
         query_mode=args.query_mode,
+        workers=args.workers,
     )
 
 
@@ -286,5 +294,18 @@ def _cmd_analyze(args) -> None:
     print(report)
 
 
+# name -> (help, argument builder, handler)
+_COMMANDS = {
+    "run": ("Run evaluation", _add_run_args, _cmd_run),
+    "mini": ("Run agentic evaluation via mini-SWE-agent", _add_mini_args, _cmd_mini),
+    "retrieval": (
+        "Evaluate retrieval quality against gold patches",
+        _add_retrieval_args,
+        _cmd_retrieval,
+    ),
+    "analyze": ("Analyze results", _add_analyze_args, _cmd_analyze),
+}
+
+
 if __name__ == "__main__":
     main()
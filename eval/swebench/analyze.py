@@ -2,10 +2,17 @@
 
 from __future__ import annotations
 
+import io
 import json
+import os
 from dataclasses import dataclass, field
 from pathlib import Path
 
+try:  # orjson is optional; it parses bytes directly and much faster
+    from orjson import loads as _loads
+except ImportError:
+    _loads = json.loads
+
 
 @dataclass
 class ConditionResult:
@@ -42,8 +49,11 @@ def load_swebench_results(results_dir: str | Path) -> dict:
         results_dir / "results.json",
         results_dir / "eval_results.json",
     ]:
-        if candidate.exists():
-            return json.loads(candidate.read_text())
+        try:
+            data = candidate.read_bytes()
+        except FileNotFoundError:
+            continue
+        return _loads(data)
     raise FileNotFoundError(
         f"No results JSON found in {results_dir}. "
         f"Expected results.json or eval_results.json."
@@ -65,14 +75,18 @@ def analyze_condition(
     Returns:
         ConditionResult with aggregated metrics.
     """
-    # Count submitted predictions
+    # Count submitted predictions: one newline-terminated record per line,
+    # counted in C over raw chunks rather than line by line.
     submitted = 0
     predictions_path = Path(predictions_path)
     if predictions_path.exists():
-        with open(predictions_path) as f:
-            for line in f:
-                if line.strip():
-                    submitted += 1
+        last = b"\n"
+        with open(predictions_path, "rb") as f:
+            while chunk := f.read(1 << 20):
+                submitted += chunk.count(b"\n")
+                last = chunk[-1:]
+        if last != b"\n":
+            submitted += 1  # final record without trailing newline
 
     # Extract resolved instance IDs from SWE-bench results
     resolved_ids = results.get("resolved", [])
@@ -101,24 +115,34 @@ def compare_conditions(
     Returns:
         Markdown formatted comparison report.
     """
-    lines: list[str] = []
-    lines.append("# SWE-bench Lite Evaluation Results\n")
-    lines.append("## Summary\n")
-    lines.append("| Condition | Submitted | Resolved | Resolution Rate |")
-    lines.append("|-----------|-----------|----------|-----------------|")
+    buf = io.StringIO()
+
+    def w(line: str) -> None:
+        buf.write(line)
+        buf.write("\n")
+
+    w("# SWE-bench Lite Evaluation Results\n")
+    w("## Summary\n")
+    w("| Condition | Submitted | Resolved | Resolution Rate |")
+    w("|-----------|-----------|----------|-----------------|")
     for r in results:
-        lines.append(
+        w(
             f"| {r.condition_id} | {r.submitted} | {r.resolved} | "
             f"{r.resolution_rate:.1%} |"
         )
 
     # Find baseline for delta computation
-    baseline = next((r for r in results if r.condition_id == "baseline"), None)
+    by_id = {r.condition_id: r for r in results}
+    baseline = by_id.get("baseline")
+
+    # Nothing to compare against: skip the empty delta/per-instance sections
+    if baseline is None or len(results) < 2:
+        return buf.getvalue()[:-1]
 
-    if baseline is not None and baseline.resolved > 0:
-        lines.append("\n## Delta vs Baseline\n")
-        lines.append("| Condition | Baseline | Enhanced | Delta | Relative |")
-        lines.append("|-----------|----------|----------|-------|----------|")
+    if baseline.resolved > 0:
+        w("\n## Delta vs Baseline\n")
+        w("| Condition | Baseline | Enhanced | Delta | Relative |")
+        w("|-----------|----------|----------|-------|----------|")
         for r in results:
             if r.condition_id == "baseline":
                 continue
@@ -128,37 +152,36 @@ def compare_conditions(
                 if baseline.resolved > 0
                 else "N/A"
             )
-            lines.append(
+            w(
                 f"| {r.condition_id} | {baseline.resolved} | {r.resolved} | "
                 f"{delta:+d} | {relative} |"
             )
 
     # Per-instance analysis: which instances flipped from fail to pass
-    if baseline is not None:
-        baseline_set = set(baseline.resolved_ids)
-        lines.append("\n## Per-Instance Analysis\n")
-        for r in results:
-            if r.condition_id == "baseline":
-                continue
-            enhanced_set = set(r.resolved_ids)
-            gained = sorted(enhanced_set - baseline_set)
-            lost = sorted(baseline_set - enhanced_set)
-            if gained:
-                lines.append(
-                    f"### {r.condition_id}: Gained ({len(gained)} instances)\n"
-                )
-                for inst_id in gained:
-                    lines.append(f"- {inst_id}")
-                lines.append("")
-            if lost:
-                lines.append(
-                    f"### {r.condition_id}: Lost ({len(lost)} instances)\n"
-                )
-                for inst_id in lost:
-                    lines.append(f"- {inst_id}")
-                lines.append("")
-
-    return "\n".join(lines)
+    baseline_set = frozenset(baseline.resolved_ids)
+    w("\n## Per-Instance Analysis\n")
+    for r in results:
+        if r.condition_id == "baseline":
+            continue
+        enhanced_set = frozenset(r.resolved_ids)
+        gained = sorted(enhanced_set - baseline_set)
+        lost = sorted(baseline_set - enhanced_set)
+        if gained:
+            w(
+                f"### {r.condition_id}: Gained ({len(gained)} instances)\n"
+            )
+            for inst_id in gained:
+                w(f"- {inst_id}")
+            w("")
+        if lost:
+            w(
+                f"### {r.condition_id}: Lost ({len(lost)} instances)\n"
+            )
+            for inst_id in lost:
+                w(f"- {inst_id}")
+            w("")
+
+    return buf.getvalue()[:-1]  # no trailing newline
 
 
 def generate_report(
@@ -181,11 +204,15 @@ def generate_report(
     output_dir = Path(output_dir)
 
     if condition_ids is None:
-        condition_ids = sorted(
-            d.name
-            for d in output_dir.iterdir()
-            if d.is_dir() and (d / "predictions.jsonl").exists()
-        )
+        # scandir reports entry types from the directory listing itself,
+        # so only the predictions.jsonl probe costs a stat per condition
+        with os.scandir(output_dir) as it:
+            condition_ids = sorted(
+                e.name
+                for e in it
+                if e.is_dir()
+                and os.path.exists(os.path.join(e.path, "predictions.jsonl"))
+            )
 
     all_results: list[ConditionResult] = []
     for cid in condition_ids:
@@ -31,6 +31,10 @@ class LLMConfig:
     base_url: Optional[str] = None  # custom API endpoint (e.g. vLLM, Azure, LiteLLM)
     temperature: float = 0.0
     max_tokens: int = 4096
+    rpm: Optional[int] = None  # requests per minute limit (None = unlimited)
+    tpm: Optional[int] = None  # tokens per minute limit (None = unlimited)
+    cache_dir: Optional[str] = None  # on-disk response cache (temperature 0 only)
+    context_window: int = 128000  # model context size, used to cap prompt length
 
 
 @dataclass(frozen=True)
@@ -97,6 +101,10 @@ def load_config_from_yaml(path: str | Path) -> EvalConfig:
           base_url: https://custom-api.example.com/v1  # optional
           temperature: 0.0
           max_tokens: 4096
+          rpm: 500                  # optional client-side rate limits
+          tpm: 200000               # optional
+          cache_dir: eval/llm_cache # optional, used when temperature is 0
+          context_window: 128000    # optional
 
         conditions:
           - condition_id: baseline
@@ -108,7 +116,13 @@ def load_config_from_yaml(path: str | Path) -> EvalConfig:
     """
     import yaml
 
-    raw = yaml.safe_load(Path(path).read_text())
+    # Prefer the libyaml-backed loader when PyYAML was built with it
+    try:
+        from yaml import CSafeLoader as _Loader
+    except ImportError:
+        from yaml import SafeLoader as _Loader
+
+    raw = yaml.load(Path(path).read_bytes(), Loader=_Loader)
 
     llm_raw = raw["llm"]
     llm = LLMConfig(
@@ -118,6 +132,10 @@ def load_config_from_yaml(path: str | Path) -> EvalConfig:
         base_url=llm_raw.get("base_url"),
         temperature=llm_raw.get("temperature", 0.0),
         max_tokens=llm_raw.get("max_tokens", 4096),
+        rpm=llm_raw.get("rpm"),
+        tpm=llm_raw.get("tpm"),
+        cache_dir=llm_raw.get("cache_dir"),
+        context_window=llm_raw.get("context_window", 128000),
     )
 
     conditions = []
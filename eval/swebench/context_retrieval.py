@@ -2,14 +2,46 @@
 
 from __future__ import annotations
 
+import heapq
+import io
 import logging
 import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from operator import attrgetter
 from pathlib import Path
 
 from eval.swebench.config import ExperimentCondition
 
 logger = logging.getLogger(__name__)
 
+# Code references extracted from problem statements by generate_queries
+_RE_FILE_PATHS = re.compile(r'[\w/]+\.(?:py|js|ts|rs|go|java)\b')
+_RE_CAMEL = re.compile(r'\b([A-Z][a-z]+(?:[A-Z][a-zA-Z0-9]*)+)\b')
+_RE_DOTTED = re.compile(r'\b([\w]+(?:\.[\w]+){1,})\b')
+
+# Max results rendered by format_context, to stay within the context window
+_CONTEXT_LIMIT = 20
+
+_by_score = attrgetter("score")
+
+# Indexed engines keyed by (project_root, embedding_backend), least recently
+# used first.  The reranker does not affect the index, so conditions that
+# differ only in reranking share one engine (see Engine.with_reranker).
+# Every checkout lives in its own repos_dir/{owner}__{name}/{commit}
+# directory, so an index stays valid as long as callers do not modify the
+# checkout between retrievals.  The cache only needs to span the conditions
+# of one instance and a few concurrent checkouts, so it is kept small.
+_ENGINE_CACHE: OrderedDict[tuple, object] = OrderedDict()
+_ENGINE_CACHE_SIZE = 4
+_ENGINE_LOCK = threading.Lock()
+_ENGINE_BUILD_LOCKS: dict[tuple, threading.Lock] = {}
+
+# Embedding providers and rerankers by backend name, created once per
+# process and shared by every engine instead of loading a model per engine.
+_BACKENDS: dict[tuple[str, str], object] = {}
+
 
 def retrieve_context(
     project_root: str,
@@ -30,31 +62,7 @@ def retrieve_context(
     if condition.is_baseline:
         return ""
 
-    from openace.engine import Engine
-
-    embedding_provider = None
-    reranker = None
-
-    if condition.embedding_backend is not None:
-        from openace.embedding.factory import create_provider
-        embedding_provider = create_provider(condition.embedding_backend)
-
-    if condition.reranker_backend is not None:
-        from openace.reranking.factory import create_reranker
-        reranker = create_reranker(condition.reranker_backend)
-
-    engine = Engine(
-        project_root,
-        embedding_provider=embedding_provider,
-        reranker=reranker,
-    )
-
-    logger.info("Indexing %s ...", project_root)
-    report = engine.index()
-    logger.info(
-        "Indexed %d files, %d symbols in %.1fs",
-        report.files_indexed, report.total_symbols, report.duration_secs,
-    )
+    engine = _get_engine(project_root, condition)
 
     queries = generate_queries(problem_statement)
 
@@ -69,48 +77,113 @@ def retrieve_context(
         except Exception:
             logger.warning("Search failed for query: %s", q, exc_info=True)
 
-    unique_results = _dedupe_by_symbol_id(all_results)
+    unique_results = _dedupe_by_symbol_id(all_results, top_n=_CONTEXT_LIMIT)
 
     return format_context(unique_results, project_root)
 
 
-def generate_queries(problem_statement: str) -> list[str]:
+def _get_engine(project_root: str, condition: ExperimentCondition):
+    """Return an indexed Engine for this repo and condition.
+
+    The index is shared by every condition with the same embedding backend,
+    so each checkout is indexed once per embedding backend rather than once
+    per condition; the condition's reranker is applied per search.
+    """
+    key = (str(Path(project_root).resolve()), condition.embedding_backend)
+    engine = _get_indexed_engine(key, project_root, condition)
+    if condition.reranker_backend is None:
+        return engine
+    return engine.with_reranker(_backend("reranker", condition.reranker_backend))
+
+
+def _get_indexed_engine(key: tuple, project_root: str, condition: ExperimentCondition):
+    with _ENGINE_LOCK:
+        engine = _ENGINE_CACHE.get(key)
+        if engine is not None:
+            _ENGINE_CACHE.move_to_end(key)
+            return engine
+        build_lock = _ENGINE_BUILD_LOCKS.setdefault(key, threading.Lock())
+
+    # Concurrent misses on the same key wait for one build instead of
+    # indexing the same checkout twice.
+    with build_lock:
+        with _ENGINE_LOCK:
+            engine = _ENGINE_CACHE.get(key)
+            if engine is not None:
+                _ENGINE_CACHE.move_to_end(key)
+                return engine
+        return _build_engine(key, project_root, condition)
+
+
+def _backend(kind: str, name: str):
+    """Return the shared embedding provider or reranker for ``name``."""
+    with _ENGINE_LOCK:
+        backend = _BACKENDS.get((kind, name))
+        if backend is not None:
+            return backend
+        if kind == "embedding":
+            from openace.embedding.factory import create_provider
+            backend = create_provider(name)
+        else:
+            from openace.reranking.factory import create_reranker
+            backend = create_reranker(name)
+        _BACKENDS[(kind, name)] = backend
+        return backend
+
+
+def _build_engine(key: tuple, project_root: str, condition: ExperimentCondition):
+    """Create and index an Engine, then add it to the cache under ``key``."""
+    from openace.engine import Engine
+
+    embedding_provider = None
+    if condition.embedding_backend is not None:
+        embedding_provider = _backend("embedding", condition.embedding_backend)
+
+    engine = Engine(project_root, embedding_provider=embedding_provider)
+
+    logger.info("Indexing %s ...", project_root)
+    report = engine.index()
+    logger.info(
+        "Indexed %d files, %d symbols in %.1fs",
+        report.files_indexed, report.total_symbols, report.duration_secs,
+    )
+
+    with _ENGINE_LOCK:
+        _ENGINE_CACHE[key] = engine
+        if len(_ENGINE_CACHE) > _ENGINE_CACHE_SIZE:
+            _ENGINE_CACHE.popitem(last=False)
+    return engine
+
+
+@lru_cache(maxsize=2048)
+def generate_queries(problem_statement: str) -> tuple[str, ...]:
     """Generate search queries from a problem statement.
 
     Strategy:
     1. The full problem statement (truncated) as the primary semantic query.
     2. Extracted code references (file paths, class/function names) as
        secondary exact-match queries.
-    """
-    queries: list[str] = []
-    seen: set[str] = set()
-
-    def _add(q: str) -> None:
-        q = q.strip()
-        if q and q not in seen:
-            seen.add(q)
-            queries.append(q)
 
+    The function is pure, so results are memoized: every condition run on
+    the same instance reuses the queries. A tuple is returned so the cached
+    value cannot be mutated by callers.
+    """
     # Primary query: first 500 chars of problem statement for semantic search
-    _add(problem_statement[:500])
+    raw = [problem_statement[:500]]
 
     # Extract file paths mentioned in the problem statement
-    file_paths = re.findall(r'[\w/]+\.(?:py|js|ts|rs|go|java)\b', problem_statement)
-    for fp in file_paths[:3]:
-        _add(fp)
+    raw += _RE_FILE_PATHS.findall(problem_statement)[:3]
 
     # Extract potential class/function names (CamelCase or snake_case identifiers)
     # Require at least one internal uppercase letter to filter common English words
-    camel = re.findall(r'\b([A-Z][a-z]+(?:[A-Z][a-zA-Z0-9]*)+)\b', problem_statement)
-    for ident in camel[:5]:
-        _add(ident)
+    raw += _RE_CAMEL.findall(problem_statement)[:5]
 
     # Dotted references like module.ClassName.method
-    dotted = re.findall(r'\b([\w]+(?:\.[\w]+){1,})\b', problem_statement)
-    for ref in dotted[:5]:
-        _add(ref)
+    raw += _RE_DOTTED.findall(problem_statement)[:5]
 
-    return queries[:8]  # cap at 8 queries
+    # Ordered dedup of the stripped, non-empty candidates
+    queries = dict.fromkeys(q for c in raw if (q := c.strip()))
+    return tuple(queries)[:8]  # cap at 8 queries
 
 
 def format_context(results: list, project_root: str) -> str:
@@ -127,36 +200,42 @@ def format_context(results: list, project_root: str) -> str:
         return ""
 
     root = Path(project_root)
-    sections: list[str] = []
+    buf = io.StringIO()
+    buf.write("## Relevant Code Context")
 
-    for r in results[:20]:  # cap at 20 results to stay within context window
+    for r in results[:_CONTEXT_LIMIT]:
         # Make path relative to project root
         rel_path = r.file_path
 
         signals = ", ".join(r.match_signals) if r.match_signals else "unknown"
-        header = f"### File: {rel_path} (score: {r.score:.2f}, signals: {signals})"
+        buf.write(
+            f"\n\n### File: {rel_path} (score: {r.score:.2f}, signals: {signals})\n"
+        )
 
-        body_parts = [header]
+        line_start, line_end = r.line_range
         if r.snippet:
-            line_start, line_end = r.line_range
-            body_parts.append(f"```\n# Lines {line_start}-{line_end}\n{r.snippet}\n```")
+            buf.write(f"```\n# Lines {line_start}-{line_end}\n{r.snippet}\n```")
         else:
-            line_start, line_end = r.line_range
-            body_parts.append(
+            buf.write(
                 f"Symbol: `{r.qualified_name}` ({r.kind}, lines {line_start}-{line_end})"
             )
 
-        sections.append("\n".join(body_parts))
+    return buf.getvalue()
 
-    return "## Relevant Code Context\n\n" + "\n\n".join(sections)
 
+def _dedupe_by_symbol_id(results: list, top_n: int | None = None) -> list:
+    """Remove duplicate results by symbol_id, keeping the highest-scoring.
 
-def _dedupe_by_symbol_id(results: list) -> list:
-    """Remove duplicate results by symbol_id, keeping the highest-scoring."""
+    Results are ordered by descending score. If ``top_n`` is given only the
+    best ``top_n`` are kept, selected with a heap instead of a full sort.
+    """
     seen: dict[str, object] = {}
     for r in results:
-        existing = seen.get(r.symbol_id)
+        key = r.symbol_id
+        existing = seen.get(key)
         if existing is None or r.score > existing.score:
-            seen[r.symbol_id] = r
+            seen[key] = r
 
-    return sorted(seen.values(), key=lambda r: r.score, reverse=True)
+    if top_n is not None:
+        return heapq.nlargest(top_n, seen.values(), key=_by_score)
+    return sorted(seen.values(), key=_by_score, reverse=True)
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import json
 from dataclasses import dataclass, field
 from typing import Optional
 
@@ -20,6 +21,14 @@ class SWEInstance:
     pass_to_pass: list[str] = field(default_factory=list)
 
 
+# Dataset columns read into SWEInstance; the rest (test_patch, ...) are
+# dropped before conversion.
+_COLUMNS = (
+    "instance_id", "repo", "base_commit", "problem_statement",
+    "hints_text", "patch", "FAIL_TO_PASS", "PASS_TO_PASS",
+)
+
+
 def load_dataset(
     dataset_name: str = "princeton-nlp/SWE-bench_Lite",
     *,
@@ -42,23 +51,49 @@ def load_dataset(
 
     ds = hf_load(dataset_name, split=split)
 
-    instances: list[SWEInstance] = []
-    for row in ds:
-        inst = SWEInstance(
-            instance_id=row["instance_id"],
-            repo=row["repo"],
-            base_commit=row["base_commit"],
-            problem_statement=row["problem_statement"],
-            hints_text=row.get("hints_text", ""),
-            patch=row.get("patch", ""),
-            fail_to_pass=_parse_test_list(row.get("FAIL_TO_PASS", "[]")),
-            pass_to_pass=_parse_test_list(row.get("PASS_TO_PASS", "[]")),
-        )
-        instances.append(inst)
-
     if instance_ids is not None:
+        # Select matching rows by index so Arrow only materializes those.
         id_set = set(instance_ids)
-        instances = [i for i in instances if i.instance_id in id_set]
+        ds = ds.select(
+            [i for i, iid in enumerate(ds["instance_id"]) if iid in id_set]
+        )
+
+    if max_instances is not None and 0 <= max_instances < len(ds):
+        # Truncate the Arrow view before any rows are converted.
+        ds = ds.select(range(max_instances))
+
+    # Convert only the needed Arrow columns to lists, in one call instead of
+    # building a dict per row.  remove_columns (unlike select_columns) is
+    # available in every supported ``datasets`` release.
+    unused = [c for c in ds.column_names if c not in _COLUMNS]
+    cols = ds.remove_columns(unused).to_dict()
+    n = len(cols["instance_id"])
+
+    instances = [
+        SWEInstance(
+            instance_id=instance_id,
+            repo=repo,
+            base_commit=base_commit,
+            problem_statement=problem_statement,
+            hints_text=hints_text,
+            patch=patch,
+            fail_to_pass=_parse_test_list(fail_to_pass),
+            pass_to_pass=_parse_test_list(pass_to_pass),
+        )
+        for (
+            instance_id, repo, base_commit, problem_statement,
+            hints_text, patch, fail_to_pass, pass_to_pass,
+        ) in zip(
+            cols["instance_id"],
+            cols["repo"],
+            cols["base_commit"],
+            cols["problem_statement"],
+            cols.get("hints_text", [""] * n),
+            cols.get("patch", [""] * n),
+            cols.get("FAIL_TO_PASS", ["[]"] * n),
+            cols.get("PASS_TO_PASS", ["[]"] * n),
+        )
+    ]
 
     if max_instances is not None:
         instances = instances[:max_instances]
@@ -70,7 +105,8 @@ def _parse_test_list(raw: str | list) -> list[str]:
     """Parse a test list field which may be a JSON string or already a list."""
     if isinstance(raw, list):
         return raw
-    import json
+    if raw == "[]":  # most rows have no tests listed
+        return []
     try:
         parsed = json.loads(raw)
         if isinstance(parsed, list):
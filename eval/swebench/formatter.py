@@ -5,6 +5,11 @@ from __future__ import annotations
 import json
 from pathlib import Path
 
+try:  # orjson is optional; it parses bytes directly and much faster
+    from orjson import loads as _loads
+except ImportError:
+    _loads = json.loads
+
 from eval.swebench.config import ExperimentCondition, LLMConfig
 
 
@@ -18,6 +23,53 @@ def format_model_name(condition: ExperimentCondition, llm: LLMConfig) -> str:
     return f"openace-{condition.condition_id}+{llm.model}"
 
 
+class PredictionWriter:
+    """Append predictions for one condition to its JSONL file.
+
+    Opens ``predictions.jsonl`` once for the whole run instead of once per
+    instance.  Each record is flushed as it is written so a checkpoint
+    saved afterwards never references a prediction still in a buffer.
+
+    Usage::
+
+        with PredictionWriter(condition, llm, output_dir) as writer:
+            writer.write(instance_id, patch)
+    """
+
+    def __init__(
+        self,
+        condition: ExperimentCondition,
+        llm: LLMConfig,
+        output_dir: str | Path,
+    ) -> None:
+        self.path = Path(output_dir) / condition.condition_id / "predictions.jsonl"
+        self._model_name = format_model_name(condition, llm)
+        self._f = None
+
+    def __enter__(self) -> PredictionWriter:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._f = open(self.path, "a")
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def write(self, instance_id: str, patch: str) -> None:
+        """Append one prediction record."""
+        record = {
+            "instance_id": instance_id,
+            "model_name_or_path": self._model_name,
+            "model_patch": patch,
+        }
+        self._f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._f.flush()
+
+    def close(self) -> None:
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+
 def save_prediction(
     condition: ExperimentCondition,
     llm: LLMConfig,
@@ -29,27 +81,20 @@ def save_prediction(
 
     Each line is a JSON object:
         {"instance_id": "...", "model_name_or_path": "...", "model_patch": "..."}
-    """
-    output_dir = Path(output_dir) / condition.condition_id
-    output_dir.mkdir(parents=True, exist_ok=True)
-
-    predictions_path = output_dir / "predictions.jsonl"
-    record = {
-        "instance_id": instance_id,
-        "model_name_or_path": format_model_name(condition, llm),
-        "model_patch": patch,
-    }
 
-    with open(predictions_path, "a") as f:
-        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    For many predictions prefer :class:`PredictionWriter`, which keeps the
+    file open.
+    """
+    with PredictionWriter(condition, llm, output_dir) as writer:
+        writer.write(instance_id, patch)
 
 
 def load_predictions(path: str | Path) -> list[dict]:
     """Load predictions from a JSONL file."""
     results = []
-    with open(path) as f:
+    with open(path, "rb") as f:
         for line in f:
             line = line.strip()
             if line:
-                results.append(json.loads(line))
+                results.append(_loads(line))
     return results
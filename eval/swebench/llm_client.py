@@ -2,11 +2,16 @@
 
 from __future__ import annotations
 
+import hashlib
+import json
 import logging
 import os
+import random
+import threading
 import time
 from dataclasses import dataclass, field
-from typing import Protocol
+from pathlib import Path
+from typing import Callable, Optional, Protocol
 
 from eval.swebench.config import LLMConfig
 
@@ -14,24 +19,216 @@ logger = logging.getLogger(__name__)
 
 _MAX_RETRIES = 5
 _RETRY_BASE_DELAY = 2.0  # seconds
+_MAX_DELAY = 60.0  # seconds
+# HTTP statuses worth retrying (529 is Anthropic's "overloaded")
+_RETRYABLE_STATUS = frozenset({408, 429, 500, 502, 503, 504, 529})
 
 
 @dataclass
 class TokenUsage:
-    """Accumulated token usage statistics."""
+    """Accumulated token usage statistics.
+
+    ``prompt_tokens`` counts every input token, including those served from
+    or written to the provider's prompt cache.
+    """
 
     prompt_tokens: int = 0
     completion_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_creation_tokens: int = 0
 
     @property
     def total_tokens(self) -> int:
         return self.prompt_tokens + self.completion_tokens
 
+    @property
+    def cache_hit_rate(self) -> float:
+        """Fraction of prompt tokens read from the prompt cache."""
+        if not self.prompt_tokens:
+            return 0.0
+        return self.cache_read_tokens / self.prompt_tokens
+
+
+class _RateLimiter:
+    """Thread-safe token bucket refilled continuously at a fixed rate."""
+
+    def __init__(self, per_minute: int) -> None:
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.refill_rate = per_minute / 60.0  # tokens per second
+        self.last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.last_refill) * self.refill_rate
+        )
+        self.last_refill = now
+
+    def acquire(self, n: float = 1) -> None:
+        """Block until ``n`` tokens are available, then consume them."""
+        n = min(n, self.capacity)  # a single call must always fit eventually
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= n:
+                    self.tokens -= n
+                    return
+                wait = (n - self.tokens) / self.refill_rate
+            time.sleep(wait)
+
+    def penalize(self, seconds: float) -> None:
+        """Drain the bucket so that callers back off for ``seconds``."""
+        with self._lock:
+            self._refill()
+            self.tokens -= seconds * self.refill_rate
+
+
+# One (rpm, tpm) limiter pair per (provider, model), shared by all clients
+_LIMITERS: dict[tuple[str, str], tuple[_RateLimiter | None, _RateLimiter | None]] = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+def _get_limiters(
+    config: LLMConfig,
+) -> tuple[_RateLimiter | None, _RateLimiter | None]:
+    key = (config.provider, config.model)
+    with _LIMITERS_LOCK:
+        limiters = _LIMITERS.get(key)
+        if limiters is None:
+            limiters = (
+                _RateLimiter(config.rpm) if config.rpm else None,
+                _RateLimiter(config.tpm) if config.tpm else None,
+            )
+            _LIMITERS[key] = limiters
+        return limiters
+
+
+def _estimate_tokens(prompt: str, system: str, max_tokens: int) -> int:
+    """Rough request size for TPM accounting (~4 chars per token)."""
+    return (len(prompt) + len(system)) // 4 + max_tokens
+
+
+def _retry_after(exc: Exception) -> float | None:
+    """Seconds from a ``Retry-After`` header on a 429 response, if any."""
+    if getattr(exc, "status_code", None) != 429:
+        return None
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _is_retryable(exc: Exception) -> bool:
+    """Retry transient HTTP errors and anything without a status (network)."""
+    status = getattr(exc, "status_code", None)
+    return status is None or status in _RETRYABLE_STATUS
+
+
+def _retry_delay(exc: Exception, prev_delay: float) -> float:
+    """Retry-After if the server sent one, else decorrelated jitter."""
+    retry_after = _retry_after(exc)
+    if retry_after is not None:
+        return retry_after
+    return min(
+        _MAX_DELAY,
+        random.uniform(_RETRY_BASE_DELAY, max(_RETRY_BASE_DELAY, prev_delay) * 3),
+    )
+
+
+def _throttle(
+    limiters: tuple[_RateLimiter | None, _RateLimiter | None], n_tokens: int,
+) -> None:
+    rpm, tpm = limiters
+    if rpm is not None:
+        rpm.acquire()
+    if tpm is not None:
+        tpm.acquire(n_tokens)
+
+
+def _backoff_rate_limit(
+    limiters: tuple[_RateLimiter | None, _RateLimiter | None], exc: Exception,
+) -> None:
+    retry_after = _retry_after(exc)
+    if retry_after is None:
+        return
+    for limiter in limiters:
+        if limiter is not None:
+            limiter.penalize(retry_after)
+
+
+class _ResponseCache:
+    """On-disk cache of responses to deterministic (temperature 0) requests.
+
+    Entries live at ``cache_dir/<key[:2]>/<key>`` where the key is the
+    SHA-256 of everything that determines the response.  Responses cut
+    short by ``stop_when`` are keyed apart from full ones, so a truncated
+    completion is never returned to a caller that wanted all of it.
+    """
+
+    def __init__(self, config: LLMConfig, cache_dir: str) -> None:
+        self._root = Path(cache_dir)
+        self._identity = {
+            "provider": config.provider,
+            "model": config.model,
+            "base_url": config.base_url,
+            "max_tokens": config.max_tokens,
+        }
+
+    def _path(self, prompt: str, system: str, stopped_early: bool) -> Path:
+        fields = {**self._identity, "system": system, "prompt": prompt}
+        if stopped_early:
+            fields["stopped_early"] = True
+        payload = json.dumps(fields, sort_keys=True)
+        key = hashlib.sha256(payload.encode()).hexdigest()
+        return self._root / key[:2] / key
+
+    def get(
+        self, prompt: str, system: str, *, stopped_early: bool = False,
+    ) -> str | None:
+        try:
+            path = self._path(prompt, system, stopped_early)
+            return json.loads(path.read_bytes())["text"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def put(
+        self,
+        prompt: str,
+        system: str,
+        text: str,
+        usage: dict,
+        *,
+        stopped_early: bool = False,
+    ) -> None:
+        path = self._path(prompt, system, stopped_early)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps({"text": text, "usage": usage}))
+        os.replace(tmp, path)  # atomic, so readers never see partial entries
+
+
+def _response_cache(config: LLMConfig) -> _ResponseCache | None:
+    if config.cache_dir and config.temperature == 0:
+        return _ResponseCache(config, config.cache_dir)
+    return None
+
 
 class LLMClient(Protocol):
     """Unified LLM client interface."""
 
-    def generate(self, prompt: str, *, system: str = "") -> str: ...
+    def generate(
+        self,
+        prompt: str,
+        *,
+        system: str = "",
+        stop_when: Optional[Callable[[str], bool]] = None,
+    ) -> str: ...
 
 
 class OpenAIClient:
@@ -52,30 +249,62 @@ class OpenAIClient:
         self._model = config.model
         self._temperature = config.temperature
         self._max_tokens = config.max_tokens
+        self._limiters = _get_limiters(config)
+        self._cache = _response_cache(config)
         self.usage = TokenUsage()
 
-    def generate(self, prompt: str, *, system: str = "") -> str:
+    def generate(
+        self,
+        prompt: str,
+        *,
+        system: str = "",
+        stop_when: Optional[Callable[[str], bool]] = None,
+    ) -> str:
+        """Generate a completion for ``prompt``.
+
+        If ``stop_when`` is given the response is streamed and cut off as
+        soon as ``stop_when(text_so_far)`` returns True; it is checked each
+        time a chunk ends a line.
+        """
+        if self._cache is not None:
+            cached = self._cache.get(
+                prompt, system, stopped_early=stop_when is not None,
+            )
+            if cached is not None:
+                return cached
+
         messages = []
         if system:
             messages.append({"role": "system", "content": system})
         messages.append({"role": "user", "content": prompt})
 
+        n_tokens = _estimate_tokens(prompt, system, self._max_tokens)
+        delay = 0.0
         for attempt in range(_MAX_RETRIES):
+            _throttle(self._limiters, n_tokens)
             try:
-                resp = self._client.chat.completions.create(
-                    model=self._model,
-                    messages=messages,
-                    temperature=self._temperature,
-                    max_tokens=self._max_tokens,
-                )
-                if resp.usage:
-                    self.usage.prompt_tokens += resp.usage.prompt_tokens
-                    self.usage.completion_tokens += resp.usage.completion_tokens
-                return resp.choices[0].message.content or ""
+                if stop_when is None:
+                    text, usage = self._complete(messages)
+                else:
+                    text, usage = self._stream(messages, stop_when)
+                    if usage is None:
+                        # Stopped before the final usage chunk arrived
+                        usage = (n_tokens - self._max_tokens, len(text) // 4, 0)
+                prompt_tokens, completion_tokens, cached = usage
+                self.usage.prompt_tokens += prompt_tokens
+                self.usage.completion_tokens += completion_tokens
+                self.usage.cache_read_tokens += cached
+                if self._cache is not None:
+                    self._cache.put(prompt, system, text, {
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": completion_tokens,
+                    }, stopped_early=stop_when is not None)
+                return text
             except Exception as e:
-                if attempt == _MAX_RETRIES - 1:
+                _backoff_rate_limit(self._limiters, e)
+                if attempt == _MAX_RETRIES - 1 or not _is_retryable(e):
                     raise
-                delay = _RETRY_BASE_DELAY * (2 ** attempt)
+                delay = _retry_delay(e, delay)
                 logger.warning(
                     "OpenAI request failed (attempt %d/%d): %s — retrying in %.1fs",
                     attempt + 1, _MAX_RETRIES, e, delay,
@@ -83,6 +312,51 @@ class OpenAIClient:
                 time.sleep(delay)
         return ""  # unreachable
 
+    @staticmethod
+    def _usage(usage) -> tuple[int, int, int]:
+        # OpenAI caches identical prompt prefixes automatically
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = getattr(details, "cached_tokens", 0) or 0
+        return usage.prompt_tokens, usage.completion_tokens, cached
+
+    def _complete(self, messages: list) -> tuple[str, tuple[int, int, int]]:
+        resp = self._client.chat.completions.create(
+            model=self._model,
+            messages=messages,
+            temperature=self._temperature,
+            max_tokens=self._max_tokens,
+        )
+        usage = self._usage(resp.usage) if resp.usage else (0, 0, 0)
+        return resp.choices[0].message.content or "", usage
+
+    def _stream(
+        self, messages: list, stop_when: Callable[[str], bool],
+    ) -> tuple[str, tuple[int, int, int] | None]:
+        stream = self._client.chat.completions.create(
+            model=self._model,
+            messages=messages,
+            temperature=self._temperature,
+            max_tokens=self._max_tokens,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        parts: list[str] = []
+        usage = None
+        try:
+            for chunk in stream:
+                if chunk.usage:
+                    usage = self._usage(chunk.usage)
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    parts.append(delta)
+                    if "\n" in delta and stop_when("".join(parts)):
+                        break
+        finally:
+            stream.close()
+        return "".join(parts), usage
+
 
 class AnthropicClient:
     """LLM client backed by the Anthropic API."""
@@ -102,10 +376,34 @@ class AnthropicClient:
         self._model = config.model
         self._temperature = config.temperature
         self._max_tokens = config.max_tokens
+        self._limiters = _get_limiters(config)
+        self._cache = _response_cache(config)
         self.usage = TokenUsage()
 
-    def generate(self, prompt: str, *, system: str = "") -> str:
+    def generate(
+        self,
+        prompt: str,
+        *,
+        system: str = "",
+        stop_when: Optional[Callable[[str], bool]] = None,
+    ) -> str:
+        """Generate a completion for ``prompt``.
+
+        If ``stop_when`` is given the response is streamed and cut off as
+        soon as ``stop_when(text_so_far)`` returns True; it is checked each
+        time a chunk ends a line.
+        """
+        if self._cache is not None:
+            cached = self._cache.get(
+                prompt, system, stopped_early=stop_when is not None,
+            )
+            if cached is not None:
+                return cached
+
+        n_tokens = _estimate_tokens(prompt, system, self._max_tokens)
+        delay = 0.0
         for attempt in range(_MAX_RETRIES):
+            _throttle(self._limiters, n_tokens)
             try:
                 kwargs: dict = {
                     "model": self._model,
@@ -115,17 +413,41 @@ class AnthropicClient:
                 if self._temperature > 0:
                     kwargs["temperature"] = self._temperature
                 if system:
+                    # No cache_control breakpoint: Anthropic only caches
+                    # prefixes of at least 1024 tokens, and the static
+                    # system + instruction prefix here is far shorter.
                     kwargs["system"] = system
 
-                resp = self._client.messages.create(**kwargs)
-                if resp.usage:
-                    self.usage.prompt_tokens += resp.usage.input_tokens
-                    self.usage.completion_tokens += resp.usage.output_tokens
-                return resp.content[0].text if resp.content else ""
+                if stop_when is None:
+                    resp = self._client.messages.create(**kwargs)
+                    text = resp.content[0].text if resp.content else ""
+                    usage = resp.usage
+                    output_tokens = usage.output_tokens if usage else 0
+                else:
+                    text, usage, output_tokens = self._stream(kwargs, stop_when)
+                if usage:
+                    # input_tokens excludes cached tokens on Anthropic
+                    cache_read = getattr(usage, "cache_read_input_tokens", 0) or 0
+                    cache_creation = (
+                        getattr(usage, "cache_creation_input_tokens", 0) or 0
+                    )
+                    self.usage.prompt_tokens += (
+                        usage.input_tokens + cache_read + cache_creation
+                    )
+                    self.usage.completion_tokens += output_tokens
+                    self.usage.cache_read_tokens += cache_read
+                    self.usage.cache_creation_tokens += cache_creation
+                if self._cache is not None:
+                    self._cache.put(prompt, system, text, {
+                        "prompt_tokens": usage.input_tokens if usage else 0,
+                        "completion_tokens": output_tokens,
+                    }, stopped_early=stop_when is not None)
+                return text
             except Exception as e:
-                if attempt == _MAX_RETRIES - 1:
+                _backoff_rate_limit(self._limiters, e)
+                if attempt == _MAX_RETRIES - 1 or not _is_retryable(e):
                     raise
-                delay = _RETRY_BASE_DELAY * (2 ** attempt)
+                delay = _retry_delay(e, delay)
                 logger.warning(
                     "Anthropic request failed (attempt %d/%d): %s — retrying in %.1fs",
                     attempt + 1, _MAX_RETRIES, e, delay,
@@ -133,6 +455,31 @@ class AnthropicClient:
                 time.sleep(delay)
         return ""  # unreachable
 
+    def _stream(self, kwargs: dict, stop_when: Callable[[str], bool]):
+        """Stream a message; returns (text, input usage, output tokens)."""
+        parts: list[str] = []
+        usage = None
+        output_tokens = 0
+        with self._client.messages.stream(**kwargs) as stream:
+            for event in stream:
+                if event.type == "message_start":
+                    usage = event.message.usage
+                    output_tokens = usage.output_tokens
+                elif event.type == "message_delta":
+                    output_tokens = event.usage.output_tokens
+                elif (
+                    event.type == "content_block_delta"
+                    and event.delta.type == "text_delta"
+                ):
+                    delta = event.delta.text
+                    parts.append(delta)
+                    if "\n" in delta and stop_when("".join(parts)):
+                        # The final output count never arrives; estimate it
+                        text = "".join(parts)
+                        output_tokens = max(output_tokens, len(text) // 4)
+                        break
+        return "".join(parts), usage, output_tokens
+
 
 def create_llm_client(config: LLMConfig) -> OpenAIClient | AnthropicClient:
     """Factory to create the right LLM client from config."""
@@ -11,7 +11,9 @@ from __future__ import annotations
 import json
 import logging
 import time
+import threading
 import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import Optional
 
@@ -37,6 +39,7 @@ def run_mini_swebench(
     cost_limit: float = 3.0,
     api_base: Optional[str] = None,
     api_key: Optional[str] = None,
+    max_concurrency: int = 8,
 ) -> None:
     """Run mini-SWE-agent on SWE-bench instances for given conditions.
 
@@ -54,6 +57,7 @@ def run_mini_swebench(
         cost_limit: Max cost per instance in USD.
         api_base: Custom API base URL for OpenAI-compatible services.
         api_key: API key (overrides OPENAI_API_KEY env var).
+        max_concurrency: Max instances processed at once per condition.
     """
     from datasets import load_dataset as hf_load
 
@@ -79,6 +83,14 @@ def run_mini_swebench(
     # Load base mini-SWE-agent config
     base_config_path = builtin_config_dir / "benchmarks" / "swebench.yaml"
     base_config = get_config_from_spec(str(base_config_path))
+    run_config = _build_run_config(
+        base_config,
+        model_name=model_name,
+        step_limit=step_limit,
+        cost_limit=cost_limit,
+        api_base=api_base,
+        api_key=api_key,
+    )
 
     output_root = Path(output_dir)
 
@@ -88,72 +100,80 @@ def run_mini_swebench(
 
         # Load checkpoint (already completed instances)
         preds_path = cond_output / "preds.json"
+        _flush_preds(preds_path)  # fold in updates left by an interrupted run
         existing = _load_preds(preds_path)
         remaining = [i for i in instances if i["instance_id"] not in existing]
+        # Keep instances that share a checkout adjacent so they reuse the
+        # OpenACE index cached by retrieve_context instead of rebuilding it.
+        groups: dict[tuple[str, str], list[dict]] = {}
+        for inst in remaining:
+            groups.setdefault((inst["repo"], inst["base_commit"]), []).append(inst)
+        remaining = [inst for group in groups.values() for inst in group]
         logger.info(
             "Condition %r: %d done, %d remaining",
             condition_id, len(existing), len(remaining),
         )
 
-        for idx, instance in enumerate(remaining):
-            iid = instance["instance_id"]
-            logger.info(
-                "[%s] %s (%d/%d)",
-                condition_id, iid, idx + 1, len(remaining),
-            )
-
+        def _run(instance: dict) -> float:
+            logger.info("[%s] %s started", condition_id, instance["instance_id"])
             t0 = time.monotonic()
-            try:
-                _process_one(
-                    instance=instance,
-                    condition_id=condition_id,
-                    model_name=model_name,
-                    base_config=base_config,
-                    cond_output=cond_output,
-                    repos_dir=repos_dir,
-                    openace_embedding=openace_embedding,
-                    openace_reranker=openace_reranker,
-                    step_limit=step_limit,
-                    cost_limit=cost_limit,
-                    api_base=api_base,
-                    api_key=api_key,
-                )
-                elapsed = time.monotonic() - t0
-                logger.info("[%s] %s done (%.1fs)", condition_id, iid, elapsed)
-            except Exception:
-                logger.error("[%s] %s FAILED", condition_id, iid, exc_info=True)
-
-
-def _process_one(
+            _process_one(
+                instance=instance,
+                condition_id=condition_id,
+                model_name=model_name,
+                config=run_config,
+                cond_output=cond_output,
+                repos_dir=repos_dir,
+                openace_embedding=openace_embedding,
+                openace_reranker=openace_reranker,
+            )
+            return time.monotonic() - t0
+
+        # Instances are IO-bound (Docker, agent steps, LLM round-trips), so
+        # run them on threads; _update_preds serializes the preds.json writes.
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as ex:
+                futures = {
+                    ex.submit(_run, inst): inst["instance_id"] for inst in remaining
+                }
+                for idx, fut in enumerate(as_completed(futures)):
+                    iid = futures[fut]
+                    try:
+                        elapsed = fut.result()
+                        logger.info(
+                            "[%s] %s done (%.1fs, %d/%d)",
+                            condition_id, iid, elapsed, idx + 1, len(remaining),
+                        )
+                    except Exception:
+                        logger.error(
+                            "[%s] %s FAILED (%d/%d)",
+                            condition_id, iid, idx + 1, len(remaining),
+                            exc_info=True,
+                        )
+        finally:
+            _flush_preds(preds_path)
+
+
+def _build_run_config(
+    base_config: dict,
     *,
-    instance: dict,
-    condition_id: str,
     model_name: str,
-    base_config: dict,
-    cond_output: Path,
-    repos_dir: str,
-    openace_embedding: Optional[str],
-    openace_reranker: Optional[str],
     step_limit: int,
     cost_limit: float,
     api_base: Optional[str] = None,
     api_key: Optional[str] = None,
-) -> None:
-    """Process a single (condition, instance) pair."""
+) -> dict:
+    """Merge the run-wide model and agent overrides into the base config.
+
+    Built once per run and shared read-only by every instance.
+    """
     import copy
 
-    from minisweagent.agents.default import DefaultAgent
-    from minisweagent.models import get_model
     from minisweagent.utils.serialize import recursive_merge
 
-    iid = instance["instance_id"]
-    task = instance["problem_statement"]
-
-    # Build config with overrides
     # LitellmModelConfig only has model_name and model_kwargs fields;
     # api_base and api_key must go into model_kwargs so they get unpacked
     # as kwargs to litellm.completion().
-    config = copy.deepcopy(base_config)
     model_overrides: dict = {
         "model_name": model_name,
         # Custom/unmapped models won't have cost info in litellm's registry;
@@ -167,13 +187,65 @@ def _process_one(
         extra_kwargs["api_key"] = api_key
     if extra_kwargs:
         model_overrides["model_kwargs"] = extra_kwargs
-    config = recursive_merge(config, {
+    return recursive_merge(copy.deepcopy(base_config), {
         "model": model_overrides,
         "agent": {"step_limit": step_limit, "cost_limit": cost_limit},
     })
 
-    # Set up environment
+
+def _process_one(
+    *,
+    instance: dict,
+    condition_id: str,
+    model_name: str,
+    config: dict,
+    cond_output: Path,
+    repos_dir: str,
+    openace_embedding: Optional[str],
+    openace_reranker: Optional[str],
+) -> None:
+    """Process a single (condition, instance) pair.
+
+    ``config`` is the merged run config from :func:`_build_run_config`; it
+    is shared across instances and must not be mutated.
+    """
+    # Fresh environment per (condition, instance) so conditions never share
+    # agent side effects (installed packages, files outside the repo).
     env = _get_sb_environment(config, instance)
+    try:
+        _run_agent(
+            config=config,
+            env=env,
+            instance=instance,
+            condition_id=condition_id,
+            model_name=model_name,
+            cond_output=cond_output,
+            repos_dir=repos_dir,
+            openace_embedding=openace_embedding,
+            openace_reranker=openace_reranker,
+        )
+    finally:
+        _close_env(env)
+
+
+def _run_agent(
+    *,
+    config: dict,
+    env,
+    instance: dict,
+    condition_id: str,
+    model_name: str,
+    cond_output: Path,
+    repos_dir: str,
+    openace_embedding: Optional[str],
+    openace_reranker: Optional[str],
+) -> None:
+    """Run the agent for one instance in ``env`` and record its prediction."""
+    from minisweagent.agents.default import DefaultAgent
+    from minisweagent.models import get_model
+
+    iid = instance["instance_id"]
+    task = instance["problem_statement"]
 
     # Pre-retrieve OpenACE context if not baseline
     openace_context = ""
@@ -182,11 +254,16 @@ def _process_one(
             instance, repos_dir, openace_embedding, openace_reranker,
         )
 
-    # Inject OpenACE template into instance_template
+    # Inject OpenACE template into instance_template (on a copy, since
+    # config is shared between instances)
+    agent_config = config.get("agent", {})
     if openace_context:
-        config["agent"]["instance_template"] = _inject_context_section(
-            config["agent"]["instance_template"],
-        )
+        agent_config = {
+            **agent_config,
+            "instance_template": _inject_context_section(
+                agent_config["instance_template"],
+            ),
+        }
 
     # Create model and agent
     model = get_model(config=config.get("model", {}))
@@ -199,7 +276,7 @@ def _process_one(
         model,
         env,
         output_path=traj_path,
-        **config.get("agent", {}),
+        **agent_config,
     )
 
     # Run agent — pass openace_context as a Jinja2 template variable
@@ -235,10 +312,8 @@ def _get_sb_environment(config: dict, instance: dict):
     env = get_environment(env_config)
 
     # Execute startup command if configured
-    from jinja2 import StrictUndefined, Template
-    startup = config.get("run", {}).get("env_startup_command")
-    if startup:
-        rendered = Template(startup, undefined=StrictUndefined).render(**instance)
+    rendered = _render_startup(config, instance)
+    if rendered:
         out = env.execute({"command": rendered})
         if out["returncode"] != 0:
             raise RuntimeError(f"Startup command failed: {out}")
@@ -246,6 +321,26 @@ def _get_sb_environment(config: dict, instance: dict):
     return env
 
 
+def _render_startup(config: dict, instance: dict) -> str:
+    """Render the configured environment startup command for an instance."""
+    startup = config.get("run", {}).get("env_startup_command")
+    if not startup:
+        return ""
+
+    from jinja2 import StrictUndefined, Template
+    return Template(startup, undefined=StrictUndefined).render(**instance)
+
+
+def _close_env(env) -> None:
+    cleanup = getattr(env, "cleanup", None)
+    if cleanup is None:
+        return
+    try:
+        cleanup()
+    except Exception:
+        logger.debug("Environment cleanup failed", exc_info=True)
+
+
 def _get_docker_image(instance: dict) -> str:
     """Get the SWE-bench Docker image name for an instance."""
     image = instance.get("image_name") or instance.get("docker_image")
@@ -321,28 +416,62 @@ def _inject_context_section(instance_template: str) -> str:
 # Predictions file (mini-SWE-agent compatible JSON format)
 # ---------------------------------------------------------------------------
 
-import threading
-
 _PREDS_LOCK = threading.Lock()
 
+# In-memory view of each preds.json; updates go to a preds.jsonl sidecar
+# and are compacted into preds.json by _flush_preds.
+_PREDS_CACHE: dict[Path, dict] = {}
+
+
+def _sidecar_path(path: Path) -> Path:
+    return path.with_suffix(".jsonl")
+
 
 def _load_preds(path: Path) -> dict:
-    """Load existing predictions from preds.json."""
-    if not path.exists():
-        return {}
+    """Load existing predictions from preds.json plus any pending updates."""
+    data: dict = {}
+    if path.exists():
+        try:
+            data = json.loads(path.read_text())
+        except (json.JSONDecodeError, OSError):
+            data = {}
     try:
-        return json.loads(path.read_text())
-    except (json.JSONDecodeError, OSError):
-        return {}
+        with open(_sidecar_path(path)) as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn final line from an interrupted run
+                data[rec["instance_id"]] = rec
+    except OSError:
+        pass
+    return data
 
 
 def _update_preds(path: Path, instance_id: str, model_name: str, patch: str) -> None:
-    """Thread-safe update of preds.json."""
+    """Thread-safe update of preds.json (appended to its sidecar)."""
+    rec = {
+        "instance_id": instance_id,
+        "model_name_or_path": model_name,
+        "model_patch": patch or "",
+    }
     with _PREDS_LOCK:
-        data = _load_preds(path)
-        data[instance_id] = {
-            "instance_id": instance_id,
-            "model_name_or_path": model_name,
-            "model_patch": patch or "",
-        }
+        data = _PREDS_CACHE.get(path)
+        if data is None:
+            data = _PREDS_CACHE[path] = _load_preds(path)
+        data[instance_id] = rec
+        with open(_sidecar_path(path), "a") as f:
+            f.write(json.dumps(rec) + "\n")
+
+
+def _flush_preds(path: Path) -> None:
+    """Compact pending updates into preds.json and remove the sidecar."""
+    with _PREDS_LOCK:
+        data = _PREDS_CACHE.pop(path, None)
+        sidecar = _sidecar_path(path)
+        if data is None:
+            if not sidecar.exists():
+                return
+            data = _load_preds(path)
         path.write_text(json.dumps(data, indent=2))
+        sidecar.unlink(missing_ok=True)
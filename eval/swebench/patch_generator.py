@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import logging
 import re
+from functools import lru_cache
 from pathlib import Path
 
 from eval.swebench.llm_client import LLMClient
@@ -12,6 +13,11 @@ logger = logging.getLogger(__name__)
 
 _PROMPT_TEMPLATE_PATH = Path(__file__).parent / "prompts" / "patch_generation.txt"
 
+# Tokens kept free for the system prompt and message framing
+_PROMPT_OVERHEAD_TOKENS = 512
+
+_TRUNCATION_MARKER = "\n\n... [context truncated] ...\n\n"
+
 _DEFAULT_SYSTEM = (
     "You are an expert software engineer. Your task is to fix bugs in code "
     "repositories based on issue descriptions. Generate a patch in unified diff "
@@ -25,6 +31,7 @@ def generate_patch(
     context: str,
     *,
     hints_text: str = "",
+    max_prompt_tokens: int | None = None,
 ) -> str:
     """Generate a patch using the LLM.
 
@@ -33,24 +40,96 @@ def generate_patch(
         problem_statement: The issue description.
         context: Retrieved code context (empty for baseline).
         hints_text: Optional hint text from the dataset.
+        max_prompt_tokens: Prompt token budget.  When the prompt is larger,
+            the middle of ``context`` is cut so the request fits instead of
+            being rejected by the provider.
 
     Returns:
         Generated patch as a unified diff string.
     """
     prompt = _build_prompt(problem_statement, context, hints_text)
 
+    if context and max_prompt_tokens is not None:
+        excess = _count_tokens(prompt) - max_prompt_tokens
+        if excess > 0:
+            logger.warning(
+                "Prompt exceeds budget by ~%d tokens, truncating context", excess,
+            )
+            context = _truncate_middle(context, excess)
+            prompt = _build_prompt(problem_statement, context, hints_text)
+
     logger.info(
         "Generating patch (prompt length: %d chars, context: %s)",
         len(prompt),
         "yes" if context else "no",
     )
 
-    raw_output = client.generate(prompt, system=_DEFAULT_SYSTEM)
+    usage = getattr(client, "usage", None)
+    if usage is not None:
+        prompt_before = usage.prompt_tokens
+        cached_before = usage.cache_read_tokens
+
+    raw_output = client.generate(
+        prompt, system=_DEFAULT_SYSTEM, stop_when=_has_complete_diff_block,
+    )
+
+    if usage is not None:
+        prompt_delta = usage.prompt_tokens - prompt_before
+        cached_delta = usage.cache_read_tokens - cached_before
+        logger.info(
+            "Prompt cache: %d/%d prompt tokens cached (%.1f%%)",
+            cached_delta,
+            prompt_delta,
+            100.0 * cached_delta / prompt_delta if prompt_delta else 0.0,
+        )
 
     patch = extract_diff(raw_output)
     return patch
 
 
+def prompt_token_budget(context_window: int, max_tokens: int) -> int:
+    """Tokens available for the prompt once the completion is reserved."""
+    return context_window - max_tokens - _PROMPT_OVERHEAD_TOKENS
+
+
+@lru_cache(maxsize=1)
+def _encoder():
+    """The cl100k_base tokenizer, or None when tiktoken is unavailable."""
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        # Downloads the BPE ranks on first use, which can fail offline
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        logger.warning("tiktoken encoding unavailable, estimating tokens from length")
+        return None
+
+
+def _count_tokens(text: str) -> int:
+    enc = _encoder()
+    if enc is None:
+        return len(text) // 4  # rough chars-per-token estimate
+    return len(enc.encode(text, disallowed_special=()))
+
+
+def _truncate_middle(text: str, n_tokens: int) -> str:
+    """Drop about ``n_tokens`` tokens from the middle of ``text``."""
+    enc = _encoder()
+    if enc is None:
+        units: list | str = text
+        n_remove = n_tokens * 4 + len(_TRUNCATION_MARKER)
+    else:
+        units = enc.encode(text, disallowed_special=())
+        n_remove = n_tokens + len(enc.encode(_TRUNCATION_MARKER))
+    keep = max(0, len(units) - n_remove)
+    head, tail = units[: keep - keep // 2], units[len(units) - keep // 2:]
+    if enc is not None:
+        head, tail = enc.decode(head), enc.decode(tail)
+    return head + _TRUNCATION_MARKER + tail
+
+
 def _build_prompt(
     problem_statement: str,
     context: str,
@@ -80,23 +159,30 @@ _CONTEXT_BLOCK = """\
 {context}
 """
 
+# Static instructions come first and per-instance content last, so that
+# providers with automatic prefix caching can reuse the shared prefix.
 _INLINE_TEMPLATE = """\
 Fix the bug described in the issue below.
 
-## Issue Description
-{problem_statement}
-
-## Hints
-{hints_text}
-{context_section}
 ## Instructions
 1. Analyze the issue and the relevant code.
 2. Generate a patch in unified diff format that fixes the issue.
 3. The patch should start with `diff --git` lines.
 4. Output ONLY the patch, no explanation before or after.
+{context_section}
+## Issue Description
+{problem_statement}
+
+## Hints
+{hints_text}
 """
 
 
+_FENCE_RE = re.compile(r'```(?:diff)?\s*\n(.*?)```', re.DOTALL)
+# A "diff --git" line, or a "--- " line directly followed by a "+++ " line
+_DIFF_HEAD_RE = re.compile(r'^(?:diff --git|--- .*\n\+\+\+ )', re.MULTILINE)
+
+
 def extract_diff(raw_output: str) -> str:
     """Extract a unified diff from LLM output.
 
@@ -106,11 +192,7 @@ def extract_diff(raw_output: str) -> str:
     - Multiple code blocks (takes the longest one)
     """
     # Try extracting from fenced code blocks first
-    code_blocks = re.findall(
-        r'```(?:diff)?\s*\n(.*?)```',
-        raw_output,
-        re.DOTALL,
-    )
+    code_blocks = _FENCE_RE.findall(raw_output)
     if code_blocks:
         # Pick the longest block that looks like a diff
         diff_blocks = [b for b in code_blocks if _looks_like_diff(b)]
@@ -120,22 +202,23 @@ def extract_diff(raw_output: str) -> str:
         return max(code_blocks, key=len).strip()
 
     # Try finding diff content directly (starts with diff --git or --- )
-    lines = raw_output.split("\n")
-    diff_start = None
-    for i, line in enumerate(lines):
-        if line.startswith("diff --git") or (
-            line.startswith("--- ") and i + 1 < len(lines) and lines[i + 1].startswith("+++ ")
-        ):
-            diff_start = i
-            break
-
-    if diff_start is not None:
-        return "\n".join(lines[diff_start:]).strip()
+    m = _DIFF_HEAD_RE.search(raw_output)
+    if m is not None:
+        return raw_output[m.start():].strip()
 
     # Last resort: return the raw output
     return raw_output.strip()
 
 
+def _has_complete_diff_block(text: str) -> bool:
+    """Whether ``text`` already contains a closed fenced block with a diff.
+
+    Used to stop streaming once the patch is complete, so trailing
+    explanations are not generated.
+    """
+    return any(_looks_like_diff(b) for b in _FENCE_RE.findall(text))
+
+
 def _looks_like_diff(text: str) -> bool:
     """Heuristic check if text looks like a unified diff."""
     return (
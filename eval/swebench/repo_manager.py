@@ -3,7 +3,12 @@
 from __future__ import annotations
 
 import logging
+import os
+import re
 import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
@@ -56,55 +61,99 @@ _SOURCE_EXTENSIONS: set[str] = {
 
 _STRIP_MARKER = ".source_only_stripped"
 
+# Max threads stripping top-level subtrees concurrently
+_STRIP_WORKERS = min(8, os.cpu_count() or 1)
 
-def strip_non_source_files(repo_path: Path) -> int:
+# Shared bare repository inside each {owner}__{name} directory
+_BARE_DIR = ".git-bare"
+
+
+def strip_non_source_files(repo_path: Path, base_commit: str | None = None) -> int:
     """Remove non-source-code files from a cloned repo.
 
     Keeps only files whose extension (case-insensitive) is in
     ``_SOURCE_EXTENSIONS``.  Skips the ``.git`` directory.
     Writes a marker file so the operation is idempotent across reruns.
+    When ``base_commit`` is given the marker records it, and a checkout
+    stripped at a different commit is stripped again.
 
     Returns the number of files removed.
     """
     marker = repo_path / _STRIP_MARKER
-    if marker.exists():
+    if marker.exists() and (
+        base_commit is None or marker.read_text().strip() == base_commit
+    ):
         logger.debug("Already stripped: %s", repo_path)
         return 0
 
     removed = 0
-    for f in repo_path.rglob("*"):
-        if not f.is_file():
-            continue
-        try:
-            rel = f.relative_to(repo_path)
-        except ValueError:
-            continue
-        if rel.parts[0] == ".git":
-            continue
-        if f.suffix.lower() not in _SOURCE_EXTENSIONS:
-            f.unlink()
-            removed += 1
-
-    # Clean up empty directories (bottom-up).
-    for d in sorted(repo_path.rglob("*"), reverse=True):
-        if not d.is_dir():
-            continue
-        try:
-            rel = d.relative_to(repo_path)
-        except ValueError:
-            continue
-        if rel.parts[0] == ".git":
-            continue
-        try:
-            d.rmdir()  # succeeds only when empty
-        except OSError:
-            pass
-
-    marker.write_text(str(removed))
+    subdirs: list[str] = []
+    with os.scandir(repo_path) as it:
+        for entry in it:
+            if entry.name in (".git", _STRIP_MARKER):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+            elif _is_stripped_file(entry):
+                os.unlink(entry.path)
+                removed += 1
+
+    # Top-level subtrees are independent; stripping them concurrently keeps
+    # more unlink/scandir syscalls in flight (they release the GIL).
+    workers = min(_STRIP_WORKERS, len(subdirs))
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            results = list(ex.map(_strip_tree, subdirs))
+    else:
+        results = [_strip_tree(d) for d in subdirs]
+    for path, (kept, n) in zip(subdirs, results):
+        removed += n
+        if not kept:
+            _try_rmdir(path)
+
+    marker.write_text(base_commit or str(removed))
     logger.info("Stripped %d non-source files from %s", removed, repo_path)
     return removed
 
 
+def _strip_tree(dirpath: str) -> tuple[int, int]:
+    """Strip non-source files below ``dirpath`` in one depth-first pass.
+
+    Empty subdirectories are removed on the way back up.  Returns the number
+    of entries left in ``dirpath`` and the number of files removed.
+    """
+    kept = removed = 0
+    with os.scandir(dirpath) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                sub_kept, sub_removed = _strip_tree(entry.path)
+                removed += sub_removed
+                if sub_kept or not _try_rmdir(entry.path):
+                    kept += 1
+            elif _is_stripped_file(entry):
+                os.unlink(entry.path)
+                removed += 1
+            else:
+                kept += 1
+    return kept, removed
+
+
+def _is_stripped_file(entry: os.DirEntry) -> bool:
+    """Whether ``entry`` is a (possibly symlinked) non-source file."""
+    return (
+        entry.is_file()
+        and os.path.splitext(entry.name)[1].lower() not in _SOURCE_EXTENSIONS
+    )
+
+
+def _try_rmdir(path: str) -> bool:
+    try:
+        os.rmdir(path)  # succeeds only when empty
+    except OSError:
+        return False
+    return True
+
+
 def clone_or_reuse(
     repo: str,
     base_commit: str,
@@ -113,7 +162,10 @@ def clone_or_reuse(
     """Clone the repository and checkout the specified commit.
 
     Uses a two-level cache: ``repos_dir/{owner}__{name}/{commit}/``.
-    If the directory already exists and HEAD matches, skip clone.
+    Each commit is a ``git worktree`` of one shared bare repository at
+    ``repos_dir/{owner}__{name}/.git-bare``, so all checkouts of a project
+    share a single object store.  If the directory already exists and HEAD
+    matches, skip clone.
 
     Args:
         repo: GitHub repo in ``owner/name`` format.
@@ -125,31 +177,91 @@ def clone_or_reuse(
     """
     repos_dir = Path(repos_dir)
     owner, name = repo.split("/")
-    dest = repos_dir / f"{owner}__{name}" / base_commit
+    project_dir = repos_dir / f"{owner}__{name}"
+    dest = project_dir / base_commit
 
     if dest.exists() and _head_matches(dest, base_commit):
         logger.info("Reusing cached repo: %s @ %s", repo, base_commit[:10])
         return dest
 
-    dest.mkdir(parents=True, exist_ok=True)
+    # Worktrees of one project share the bare repo's locks and shallow file
+    with _project_lock(project_dir):
+        # Another thread may have created this checkout while we waited;
+        # resetting it now would wipe that thread's index mid-use.
+        if dest.exists() and _head_matches(dest, base_commit):
+            return dest
 
-    clone_url = f"https://github.com/{repo}.git"
+        if (dest / ".git").exists():
+            # Directory exists but HEAD mismatch -- reset to the right commit.
+            logger.info("Resetting existing clone to %s", base_commit[:10])
+            _fetch_commit(dest, base_commit)
+            _run(["git", "checkout", base_commit], cwd=dest)
+            _run(["git", "clean", "-fdx"], cwd=dest)
+            return dest
 
-    if (dest / ".git").exists():
-        # Directory exists but HEAD mismatch -- reset to the right commit.
-        logger.info("Resetting existing clone to %s", base_commit[:10])
-        _run(["git", "fetch", "origin"], cwd=dest)
-        _run(["git", "checkout", base_commit], cwd=dest)
-        _run(["git", "clean", "-fdx"], cwd=dest)
-        return dest
+        bare = project_dir / _BARE_DIR
+        if not bare.exists():
+            logger.info("Cloning %s ...", repo)
+            _clone_bare(f"https://github.com/{repo}.git", bare)
 
-    logger.info("Cloning %s ...", repo)
-    _run(["git", "clone", "--quiet", clone_url, str(dest)])
-    _run(["git", "checkout", base_commit], cwd=dest)
+        _fetch_commit(bare, base_commit)
+        # Forget worktrees whose directories were deleted by hand
+        _run(["git", "worktree", "prune"], cwd=bare)
+        _run(
+            ["git", "worktree", "add", "--quiet", "--detach", str(dest.resolve()),
+             base_commit],
+            cwd=bare,
+        )
 
     return dest
 
 
+def _clone_bare(clone_url: str, bare: Path) -> None:
+    """Create the shared bare repository for a project."""
+    bare.parent.mkdir(parents=True, exist_ok=True)
+    if _supports_partial_clone():
+        # Only the tip's commit and trees; commits are fetched on demand
+        # and blobs arrive lazily with each worktree checkout.
+        _run([
+            "git", "clone", "--quiet", "--bare", "--filter=blob:none",
+            "--depth", "1", clone_url, str(bare),
+        ])
+    else:
+        _run(["git", "clone", "--quiet", "--bare", clone_url, str(bare)])
+
+
+_PROJECT_LOCKS: dict[Path, threading.Lock] = {}
+_PROJECT_LOCKS_GUARD = threading.Lock()
+
+
+def _project_lock(project_dir: Path) -> threading.Lock:
+    with _PROJECT_LOCKS_GUARD:
+        return _PROJECT_LOCKS.setdefault(project_dir.resolve(), threading.Lock())
+
+
+def _fetch_commit(repo_path: Path, commit: str) -> None:
+    """Fetch a single commit from origin, shallowly when git supports it."""
+    if _supports_partial_clone():
+        _run(
+            ["git", "fetch", "--quiet", "--depth", "1", "--filter=blob:none",
+             "origin", commit],
+            cwd=repo_path,
+        )
+    else:
+        _run(["git", "fetch", "origin"], cwd=repo_path)
+
+
+@lru_cache(maxsize=1)
+def _supports_partial_clone() -> bool:
+    """Whether the local git supports ``--filter=blob:none`` (git >= 2.27)."""
+    try:
+        out = _run(["git", "--version"]).stdout
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return False
+    m = re.search(r"(\d+)\.(\d+)", out)
+    return m is not None and (int(m.group(1)), int(m.group(2))) >= (2, 27)
+
+
 def _head_matches(repo_path: Path, expected_commit: str) -> bool:
     """Check if the repo HEAD matches the expected commit."""
     try:
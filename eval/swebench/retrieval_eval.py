@@ -8,20 +8,37 @@ from __future__ import annotations
 
 import json
 import logging
+import os
 import re
 import time
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed, wait
 from dataclasses import asdict, dataclass, field
 from pathlib import Path
 from typing import Optional
 
+from eval.metrics import compute_all
 from eval.swebench.config import ExperimentCondition
 from eval.swebench.context_retrieval import _dedupe_by_symbol_id, generate_queries
 from eval.swebench.dataset import SWEInstance, load_dataset
 from eval.swebench.repo_manager import clone_or_reuse
+from openace.embedding.factory import create_provider
+from openace.engine import Engine
+from openace.reranking.factory import create_reranker
 from openace.search_utils import _aggregate_by_file, _apply_file_score_gap
 
 logger = logging.getLogger(__name__)
 
+try:  # orjson is optional; it encodes dataclasses natively and much faster
+    import orjson
+
+    def _dumps(obj: object) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+
+except ImportError:
+
+    def _dumps(obj: object) -> bytes:
+        return json.dumps(obj, indent=2, default=asdict).encode()
+
 
 # ---------------------------------------------------------------------------
 # Data classes
@@ -63,10 +80,33 @@ class InstanceMetrics:
 # Patch parsing
 # ---------------------------------------------------------------------------
 
-_DIFF_FILE_RE = re.compile(r"^diff --git a/(.+?) b/(.+?)$", re.MULTILINE)
+_DIFF_FILE_PREFIX = "diff --git a/"
+# Start of every line that can carry gold information
+_HEADER_LINE_RE = re.compile(r"^(?:diff --git a/|@@ )", re.MULTILINE)
+# Anchored at a hunk header line. The line range holds no "@", so it ends
+# at the first " @@" without retrying later ones, and the leading
+# whitespace run is taken whole (a name can't start inside it, so giving
+# characters back only re-tries the same names). Both retries were
+# quadratic on long, malformed headers. The trailing \s can run into the
+# hunk body, so a header without context picks up the first body line's
+# name.
 _HUNK_HEADER_RE = re.compile(
-    r"^@@ .+? @@\s*(?:.*\s)?(\w[\w.]*)\s*\(", re.MULTILINE,
+    r"^@@ [^@\n]+ @@\s*(?!\s)(?:.*\s)?(\w[\w.]*)\s*\(", re.MULTILINE,
 )
+_HUNK_NOISE = frozenset({"class", "def", "if", "for", "while", "return"})
+
+
+def _diff_b_path(line: str) -> str | None:
+    """The ``b/`` path of a ``diff --git a/... b/...`` line."""
+    rest = line[len(_DIFF_FILE_PREFIX):]
+    # The a/ path is non-empty, so the separator is never at index 0
+    i = rest.find(" b/", 1)
+    while i != -1:
+        path = rest[i + 3:]
+        if path:
+            return path
+        i = rest.find(" b/", i + 1)
+    return None
 
 
 def extract_gold_from_patch(patch: str) -> GoldInfo:
@@ -75,64 +115,61 @@ def extract_gold_from_patch(patch: str) -> GoldInfo:
     Files come from ``diff --git a/... b/...`` headers (the ``b/`` side).
     Function names come from ``@@ ... @@ <context>`` hunk headers — the
     standard unified-diff context line often contains the enclosing function.
+
+    The patch is scanned once, jumping straight to header lines; the
+    hunk-header regex is only run where a header starts.
     """
     files: list[str] = []
     seen_files: set[str] = set()
-    for m in _DIFF_FILE_RE.finditer(patch):
-        path = m.group(2)
-        if path not in seen_files:
-            seen_files.add(path)
-            files.append(path)
-
     functions: list[str] = []
     seen_funcs: set[str] = set()
-    for m in _HUNK_HEADER_RE.finditer(patch):
-        name = m.group(1)
-        # Skip common noise tokens
-        if name.lower() in {"class", "def", "if", "for", "while", "return"}:
+
+    hunk_end = 0  # end of the last hunk-header match; matches never overlap
+    for head in _HEADER_LINE_RE.finditer(patch):
+        pos = head.start()
+        if patch.startswith("@@ ", pos):
+            if pos < hunk_end:
+                continue
+            m = _HUNK_HEADER_RE.match(patch, pos)
+            if m is not None:
+                hunk_end = m.end()
+                name = m.group(1)
+                # Skip common noise tokens
+                if name.lower() not in _HUNK_NOISE and name not in seen_funcs:
+                    seen_funcs.add(name)
+                    functions.append(name)
             continue
-        if name not in seen_funcs:
-            seen_funcs.add(name)
-            functions.append(name)
+        eol = patch.find("\n", pos)
+        path = _diff_b_path(patch[pos:] if eol == -1 else patch[pos:eol])
+        if path is not None and path not in seen_files:
+            seen_files.add(path)
+            files.append(path)
 
     return GoldInfo(files=files, functions=functions)
 
 
 # ---------------------------------------------------------------------------
-# Metric computation
+# Single-instance evaluation
 # ---------------------------------------------------------------------------
 
 
-def _recall_at_k(gold: list[str], retrieved: list[str], k: int) -> float:
-    """Fraction of gold items found in the top-k retrieved items."""
-    if not gold:
-        return 1.0  # vacuously true
-    top_k = set(retrieved[:k])
-    hits = sum(1 for g in gold if g in top_k)
-    return hits / len(gold)
-
+# Providers are reused across the instances a process evaluates, so local
+# models load once and HTTP clients keep their connection pools. The pid in
+# the key keeps a forked worker from reusing its parent's sessions.
+_PROVIDERS: dict[tuple, object] = {}
 
-def _mrr(gold: list[str], retrieved: list[str]) -> float:
-    """Mean Reciprocal Rank: 1/rank of the first gold hit, or 0."""
-    gold_set = set(gold)
-    for i, item in enumerate(retrieved, start=1):
-        if item in gold_set:
-            return 1.0 / i
-    return 0.0
 
-
-def _first_rank(gold: list[str], retrieved: list[str]) -> int:
-    """Rank (1-based) of the first gold hit, or 0 if not found."""
-    gold_set = set(gold)
-    for i, item in enumerate(retrieved, start=1):
-        if item in gold_set:
-            return i
-    return 0
-
-
-# ---------------------------------------------------------------------------
-# Single-instance evaluation
-# ---------------------------------------------------------------------------
+def _cached_provider(kind: str, backend: str, kwargs: Optional[dict]):
+    """Return the embedding provider or reranker for *backend*, built once."""
+    key = (os.getpid(), kind, backend, frozenset((kwargs or {}).items()))
+    provider = _PROVIDERS.get(key)
+    if provider is None:
+        if kind == "embedding":
+            provider = create_provider(backend, **(kwargs or {}))
+        else:
+            provider = create_reranker(backend, **(kwargs or {}))
+        _PROVIDERS[key] = provider
+    return provider
 
 
 def evaluate_retrieval_single(
@@ -144,6 +181,8 @@ def evaluate_retrieval_single(
     embedding_kwargs: Optional[dict] = None,
     reranker_kwargs: Optional[dict] = None,
     query_mode: str = "multi",
+    embedding_provider=None,
+    reranker=None,
 ) -> InstanceMetrics:
     """Index a repo, run queries, and score retrieval against gold.
 
@@ -157,25 +196,20 @@ def evaluate_retrieval_single(
         reranker_kwargs: Extra kwargs passed to ``create_reranker()``.
         query_mode: ``"multi"`` uses generate_queries() (multiple sub-queries),
             ``"single"`` uses problem_statement[:500] as a single query.
+        embedding_provider: Ready-made provider to use instead of building
+            one from the condition's backend.
+        reranker: Ready-made reranker, likewise.
 
     Returns:
         InstanceMetrics with recall/MRR numbers.
     """
-    from openace.engine import Engine
-
-    embedding_provider = None
-    reranker = None
-
-    if condition.embedding_backend is not None:
-        from openace.embedding.factory import create_provider
-        embedding_provider = create_provider(
-            condition.embedding_backend, **(embedding_kwargs or {}),
+    if embedding_provider is None and condition.embedding_backend is not None:
+        embedding_provider = _cached_provider(
+            "embedding", condition.embedding_backend, embedding_kwargs,
         )
-
-    if condition.reranker_backend is not None:
-        from openace.reranking.factory import create_reranker
-        reranker = create_reranker(
-            condition.reranker_backend, **(reranker_kwargs or {}),
+    if reranker is None and condition.reranker_backend is not None:
+        reranker = _cached_provider(
+            "reranker", condition.reranker_backend, reranker_kwargs,
         )
 
     engine = Engine(
@@ -201,11 +235,21 @@ def evaluate_retrieval_single(
         queries = generate_queries(instance.problem_statement)
     t1 = time.monotonic()
 
+    # Embed every sub-query in one provider call, then search with the
+    # precomputed vectors so a failing query doesn't sink the others.
+    try:
+        vectors = engine.embed_queries(list(queries))
+    except Exception:
+        logger.warning("Batch query embedding failed", exc_info=True)
+        vectors = [None] * len(queries)
+
     all_results = []
-    for q in queries:
+    pool_size = min(search_limit * 5, 200)
+    for q, vec in zip(queries, vectors):
         try:
-            pool_size = min(search_limit * 5, 200)
-            results = engine.search(q, limit=pool_size, dedupe_by_file=False)
+            results = engine.search(
+                q, limit=pool_size, dedupe_by_file=False, query_vector=vec,
+            )
             all_results.extend(results)
         except Exception:
             logger.warning("Search failed for query: %s", q, exc_info=True)
@@ -218,33 +262,38 @@ def evaluate_retrieval_single(
     file_groups = _apply_file_score_gap(file_groups)
     file_groups = file_groups[:search_limit]
 
-    # Extract file list (already sorted by tier + score)
-    retrieved_files = [g["file_path"] for g in file_groups]
-
-    # Extract function/method names (file-group order, within-file by score)
+    # One walk over the (already truncated) file groups yields the file list
+    # (sorted by tier + score) and the function/method names (file-group
+    # order, within-file by score).
+    retrieved_files: list[str] = []
     retrieved_functions: list[str] = []
     seen_funcs: set[str] = set()
     for group in file_groups:
+        retrieved_files.append(group["file_path"])
         for r in group["symbols"]:
             if r.kind in ("function", "method") and r.name not in seen_funcs:
                 seen_funcs.add(r.name)
                 retrieved_functions.append(r.name)
 
+    # One pass over each ranked list yields every recall@k, MRR and first rank
+    fm = compute_all(gold.files, retrieved_files, ks=(1, 5, 10, 20))
+    gm = compute_all(gold.functions, retrieved_functions, ks=(5, 10))
+
     return InstanceMetrics(
         instance_id=instance.instance_id,
         gold_files=gold.files,
         gold_functions=gold.functions,
         retrieved_files=retrieved_files,
         retrieved_functions=retrieved_functions,
-        file_recall_at_1=_recall_at_k(gold.files, retrieved_files, 1),
-        file_recall_at_5=_recall_at_k(gold.files, retrieved_files, 5),
-        file_recall_at_10=_recall_at_k(gold.files, retrieved_files, 10),
-        file_recall_at_20=_recall_at_k(gold.files, retrieved_files, 20),
-        function_recall_at_5=_recall_at_k(gold.functions, retrieved_functions, 5),
-        function_recall_at_10=_recall_at_k(gold.functions, retrieved_functions, 10),
-        file_mrr=_mrr(gold.files, retrieved_files),
-        function_mrr=_mrr(gold.functions, retrieved_functions),
-        first_gold_file_rank=_first_rank(gold.files, retrieved_files),
+        file_recall_at_1=fm["recall_at_1"],
+        file_recall_at_5=fm["recall_at_5"],
+        file_recall_at_10=fm["recall_at_10"],
+        file_recall_at_20=fm["recall_at_20"],
+        function_recall_at_5=gm["recall_at_5"],
+        function_recall_at_10=gm["recall_at_10"],
+        file_mrr=fm["mrr"],
+        function_mrr=gm["mrr"],
+        first_gold_file_rank=fm["first_rank"],
         num_queries=len(queries),
         index_time_secs=round(index_time, 2),
         search_time_secs=round(search_time, 4),
@@ -255,6 +304,12 @@ def evaluate_retrieval_single(
 # Main evaluation loop
 # ---------------------------------------------------------------------------
 
+_SUBSET_DATASETS = {
+    "lite": "princeton-nlp/SWE-bench_Lite",
+    "verified": "princeton-nlp/SWE-bench_Verified",
+    "full": "princeton-nlp/SWE-bench",
+}
+
 
 def run_retrieval_eval(
     conditions: list[str],
@@ -272,6 +327,7 @@ def run_retrieval_eval(
     reranker_base_url: Optional[str] = None,
     reranker_api_key: Optional[str] = None,
     query_mode: str = "multi",
+    workers: Optional[int] = None,
 ) -> dict:
     """Run retrieval evaluation across conditions and instances.
 
@@ -291,9 +347,13 @@ def run_retrieval_eval(
         reranker_api_key: Override reranker API key.
         query_mode: ``"multi"`` (default) or ``"single"`` — controls query
             generation strategy.
+        workers: Instances indexed and searched in parallel worker
+            processes (default: half the CPU count, since indexing is
+            itself multithreaded).
 
     Returns:
-        Aggregated results dict.
+        Aggregated results dict per condition; ``instances`` holds the
+        per-instance InstanceMetrics.
     """
     # Build embedding kwargs from explicit overrides
     embedding_kwargs: dict = {}
@@ -309,11 +369,7 @@ def run_retrieval_eval(
     if reranker_api_key:
         reranker_kwargs["api_key"] = reranker_api_key
 
-    dataset_name = {
-        "lite": "princeton-nlp/SWE-bench_Lite",
-        "verified": "princeton-nlp/SWE-bench_Verified",
-        "full": "princeton-nlp/SWE-bench",
-    }.get(subset, subset)
+    dataset_name = _SUBSET_DATASETS.get(subset, subset)
 
     instances = load_dataset(dataset_name, split=split)
     if slice_spec:
@@ -328,6 +384,8 @@ def run_retrieval_eval(
 
     # Build condition objects
     condition_map = _build_conditions(conditions, embedding, reranker, search_limit)
+    if workers is None:
+        workers = (os.cpu_count() or 2) // 2
 
     all_results: dict[str, dict] = {}
 
@@ -336,52 +394,85 @@ def run_retrieval_eval(
         cond_output = Path(output_dir) / cond_id
         cond_output.mkdir(parents=True, exist_ok=True)
 
-        instance_metrics: list[InstanceMetrics] = []
-
-        for i, inst in enumerate(instances):
-            logger.info(
-                "[%d/%d] %s", i + 1, len(instances), inst.instance_id,
-            )
-
-            gold = extract_gold_from_patch(inst.patch)
-            if not gold.files:
-                logger.warning(
-                    "No gold files extracted from patch for %s, skipping",
-                    inst.instance_id,
+        # Instances are independent: clone serially in this process (worktrees
+        # of one project share a bare repo), then fan indexing and search out
+        # to worker processes. Each worker builds its own provider clients
+        # and reuses them for every instance it evaluates.
+        by_index: dict[int, InstanceMetrics] = {}
+        with ProcessPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures: dict[Future, tuple[int, str]] = {}
+            in_flight: dict[str, Future] = {}
+            for i, inst in enumerate(instances):
+                logger.info(
+                    "[%d/%d] %s", i + 1, len(instances), inst.instance_id,
                 )
-                continue
 
-            try:
-                repo_path = clone_or_reuse(inst.repo, inst.base_commit, repos_dir)
-                metrics = evaluate_retrieval_single(
-                    inst, str(repo_path), condition, gold, search_limit,
+                gold = extract_gold_from_patch(inst.patch)
+                if not gold.files:
+                    logger.warning(
+                        "No gold files extracted from patch for %s, skipping",
+                        inst.instance_id,
+                    )
+                    continue
+
+                try:
+                    repo_path = str(
+                        clone_or_reuse(inst.repo, inst.base_commit, repos_dir),
+                    )
+                except Exception:
+                    logger.error(
+                        "Failed to evaluate %s", inst.instance_id, exc_info=True,
+                    )
+                    continue
+
+                # Instances at the same commit share a checkout (and its
+                # .openace index), so never hand one directory to two workers.
+                busy = in_flight.get(repo_path)
+                if busy is not None:
+                    wait([busy])
+
+                future = executor.submit(
+                    evaluate_retrieval_single,
+                    inst, repo_path, condition, gold, search_limit,
                     embedding_kwargs=embedding_kwargs or None,
                     reranker_kwargs=reranker_kwargs or None,
                     query_mode=query_mode,
                 )
-                instance_metrics.append(metrics)
+                futures[future] = (i, inst.instance_id)
+                in_flight[repo_path] = future
+
+            for future in as_completed(futures):
+                i, instance_id = futures[future]
+                try:
+                    metrics = future.result()
+                except Exception:
+                    logger.error(
+                        "Failed to evaluate %s", instance_id, exc_info=True,
+                    )
+                    continue
+                by_index[i] = metrics
 
                 logger.info(
-                    "  File R@1=%.2f R@5=%.2f R@10=%.2f MRR=%.3f | rank=%d",
+                    "  %s File R@1=%.2f R@5=%.2f R@10=%.2f MRR=%.3f | rank=%d",
+                    instance_id,
                     metrics.file_recall_at_1,
                     metrics.file_recall_at_5,
                     metrics.file_recall_at_10,
                     metrics.file_mrr,
                     metrics.first_gold_file_rank,
                 )
-            except Exception:
-                logger.error(
-                    "Failed to evaluate %s", inst.instance_id, exc_info=True,
-                )
+
+        # Keep dataset order regardless of completion order
+        instance_metrics = [by_index[i] for i in sorted(by_index)]
 
         # Aggregate and save
         agg = _aggregate_metrics(instance_metrics)
         agg["condition_id"] = cond_id
         agg["num_instances"] = len(instance_metrics)
-        agg["instances"] = [asdict(m) for m in instance_metrics]
+        agg["instances"] = instance_metrics
 
         results_path = cond_output / "retrieval_results.json"
-        results_path.write_text(json.dumps(agg, indent=2))
+        results_path.write_bytes(_dumps(agg))
         logger.info("Results saved to %s", results_path)
 
         all_results[cond_id] = agg
@@ -439,6 +530,14 @@ def _build_conditions(
     return result
 
 
+# Per-instance fields averaged by _aggregate_metrics
+_AVG_FIELDS = (
+    "file_recall_at_1", "file_recall_at_5", "file_recall_at_10",
+    "file_recall_at_20", "function_recall_at_5", "function_recall_at_10",
+    "file_mrr", "function_mrr", "index_time_secs", "search_time_secs",
+)
+
+
 def _aggregate_metrics(metrics: list[InstanceMetrics]) -> dict:
     """Compute aggregate statistics across instances."""
     if not metrics:
@@ -459,27 +558,30 @@ def _aggregate_metrics(metrics: list[InstanceMetrics]) -> dict:
 
     n = len(metrics)
 
-    def _avg(field: str) -> float:
-        return sum(getattr(m, field) for m in metrics) / n
-
-    found = sum(1 for m in metrics if m.first_gold_file_rank > 0)
-    ranks_of_found = [m.first_gold_file_rank for m in metrics if m.first_gold_file_rank > 0]
+    # One pass over metrics accumulates every average, count and rank sum.
+    totals = dict.fromkeys(_AVG_FIELDS, 0.0)
+    found = rank_sum = 0
+    for m in metrics:
+        for name in _AVG_FIELDS:
+            totals[name] += getattr(m, name)
+        if m.first_gold_file_rank > 0:
+            found += 1
+            rank_sum += m.first_gold_file_rank
+    avg = {name: total / n for name, total in totals.items()}
 
     return {
-        "file_recall_at_1": round(_avg("file_recall_at_1"), 4),
-        "file_recall_at_5": round(_avg("file_recall_at_5"), 4),
-        "file_recall_at_10": round(_avg("file_recall_at_10"), 4),
-        "file_recall_at_20": round(_avg("file_recall_at_20"), 4),
-        "function_recall_at_5": round(_avg("function_recall_at_5"), 4),
-        "function_recall_at_10": round(_avg("function_recall_at_10"), 4),
-        "file_mrr": round(_avg("file_mrr"), 4),
-        "function_mrr": round(_avg("function_mrr"), 4),
-        "avg_first_gold_file_rank": round(
-            sum(ranks_of_found) / len(ranks_of_found) if ranks_of_found else 0.0, 2,
-        ),
+        "file_recall_at_1": round(avg["file_recall_at_1"], 4),
+        "file_recall_at_5": round(avg["file_recall_at_5"], 4),
+        "file_recall_at_10": round(avg["file_recall_at_10"], 4),
+        "file_recall_at_20": round(avg["file_recall_at_20"], 4),
+        "function_recall_at_5": round(avg["function_recall_at_5"], 4),
+        "function_recall_at_10": round(avg["function_recall_at_10"], 4),
+        "file_mrr": round(avg["file_mrr"], 4),
+        "function_mrr": round(avg["function_mrr"], 4),
+        "avg_first_gold_file_rank": round(rank_sum / found if found else 0.0, 2),
         "pct_gold_file_found": round(found / n * 100, 1),
-        "avg_index_time_secs": round(_avg("index_time_secs"), 2),
-        "avg_search_time_secs": round(_avg("search_time_secs"), 4),
+        "avg_index_time_secs": round(avg["index_time_secs"], 2),
+        "avg_search_time_secs": round(avg["search_time_secs"], 4),
     }
 
 
@@ -528,16 +630,16 @@ def _format_report(all_results: dict[str, dict]) -> str:
         )
 
         for inst in agg.get("instances", []):
-            gold_str = ", ".join(Path(f).name for f in inst["gold_files"])
+            gold_str = ", ".join(Path(f).name for f in inst.gold_files)
             lines.append(
-                f"| {inst['instance_id']} "
+                f"| {inst.instance_id} "
                 f"| {gold_str} "
-                f"| {inst['file_recall_at_1']:.0%} "
-                f"| {inst['file_recall_at_5']:.0%} "
-                f"| {inst['file_recall_at_10']:.0%} "
-                f"| {inst['file_mrr']:.3f} "
-                f"| {inst['first_gold_file_rank']} "
-                f"| {inst['num_queries']} |"
+                f"| {inst.file_recall_at_1:.0%} "
+                f"| {inst.file_recall_at_5:.0%} "
+                f"| {inst.file_recall_at_10:.0%} "
+                f"| {inst.file_mrr:.3f} "
+                f"| {inst.first_gold_file_rank} "
+                f"| {inst.num_queries} |"
             )
 
         lines.append("")
@@ -4,24 +4,37 @@ from __future__ import annotations
 
 import json
 import logging
+import os
 import time
+from contextlib import ExitStack
 from pathlib import Path
 
 from eval.swebench.config import EvalConfig, ExperimentCondition
 from eval.swebench.context_retrieval import retrieve_context
 from eval.swebench.dataset import SWEInstance, load_dataset
-from eval.swebench.formatter import save_prediction
+from eval.swebench.formatter import PredictionWriter
 from eval.swebench.llm_client import create_llm_client
-from eval.swebench.patch_generator import generate_patch
+from eval.swebench.patch_generator import generate_patch, prompt_token_budget
 from eval.swebench.repo_manager import clone_or_reuse
 
+try:  # orjson is optional; its encoder is much faster on large result files
+    import orjson
+
+    def _dumps(obj: object) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+
+except ImportError:
+
+    def _dumps(obj: object) -> bytes:
+        return json.dumps(obj, indent=2).encode()
+
 logger = logging.getLogger(__name__)
 
 
 def run_evaluation(config: EvalConfig) -> None:
     """Run the full evaluation pipeline.
 
-    For each (condition, instance) pair:
+    For each (instance, condition) pair:
     1. Clone/checkout the repository at the correct commit.
     2. Retrieve relevant context using OpenACE (skip for baseline).
     3. Generate a patch using the configured LLM.
@@ -46,8 +59,12 @@ def run_evaluation(config: EvalConfig) -> None:
     completed_count = 0
     failed_count = 0
 
+    checkpoints: dict[str, set[str]] = {}
     for condition in config.conditions:
         checkpoint = _load_checkpoint(output_dir, condition)
+        # Compact leftovers of an interrupted run before appending again
+        _flush_checkpoint(output_dir, condition, checkpoint)
+        checkpoints[condition.condition_id] = checkpoint
         logger.info(
             "Condition %r: %d already completed, %d remaining",
             condition.condition_id,
@@ -55,29 +72,47 @@ def run_evaluation(config: EvalConfig) -> None:
             len(instances) - len(checkpoint),
         )
 
+    # Instances are the outer loop so every condition of one instance runs
+    # back to back and reuses the checkout's OpenACE index (retrieve_context
+    # caches only the most recent few).
+    with ExitStack() as stack:
+        writers = {
+            condition.condition_id: stack.enter_context(
+                PredictionWriter(condition, config.llm, output_dir)
+            )
+            for condition in config.conditions
+        }
         for i, instance in enumerate(instances):
-            if instance.instance_id in checkpoint:
-                completed_count += 1
-                continue
+            for condition in config.conditions:
+                checkpoint = checkpoints[condition.condition_id]
+                if instance.instance_id in checkpoint:
+                    completed_count += 1
+                    continue
+
+                pair_label = (
+                    f"[{condition.condition_id}] {instance.instance_id} "
+                    f"({i + 1}/{len(instances)})"
+                )
 
-            pair_label = (
-                f"[{condition.condition_id}] {instance.instance_id} "
-                f"({i + 1}/{len(instances)})"
-            )
+                try:
+                    t0 = time.monotonic()
+                    _process_instance(
+                        config, client, condition, instance, output_dir,
+                        writers[condition.condition_id], checkpoint,
+                    )
+                    elapsed = time.monotonic() - t0
+                    logger.info("%s — done (%.1fs)", pair_label, elapsed)
+                    completed_count += 1
+                except Exception:
+                    logger.error(
+                        "%s — FAILED", pair_label, exc_info=True,
+                    )
+                    failed_count += 1
 
-            try:
-                t0 = time.monotonic()
-                _process_instance(
-                    config, client, condition, instance, output_dir,
-                )
-                elapsed = time.monotonic() - t0
-                logger.info("%s — done (%.1fs)", pair_label, elapsed)
-                completed_count += 1
-            except Exception:
-                logger.error(
-                    "%s — FAILED", pair_label, exc_info=True,
-                )
-                failed_count += 1
+    for condition in config.conditions:
+        _flush_checkpoint(
+            output_dir, condition, checkpoints[condition.condition_id],
+        )
 
     logger.info(
         "Evaluation complete: %d/%d succeeded, %d failed",
@@ -88,8 +123,10 @@ def run_evaluation(config: EvalConfig) -> None:
     if hasattr(client, "usage"):
         u = client.usage
         logger.info(
-            "Token usage — prompt: %d, completion: %d, total: %d",
+            "Token usage — prompt: %d, completion: %d, total: %d, "
+            "cache hit rate: %.1f%%",
             u.prompt_tokens, u.completion_tokens, u.total_tokens,
+            u.cache_hit_rate * 100,
         )
 
 
@@ -99,6 +136,8 @@ def _process_instance(
     condition: ExperimentCondition,
     instance: SWEInstance,
     output_dir: Path,
+    writer: PredictionWriter,
+    checkpoint: set[str],
 ) -> None:
     """Process a single (condition, instance) pair."""
     # 1. Prepare repository
@@ -123,15 +162,16 @@ def _process_instance(
         instance.problem_statement,
         context,
         hints_text=instance.hints_text,
+        max_prompt_tokens=prompt_token_budget(
+            config.llm.context_window, config.llm.max_tokens,
+        ),
     )
 
     # 4. Save prediction
-    save_prediction(
-        condition, config.llm, instance.instance_id, patch, output_dir,
-    )
+    writer.write(instance.instance_id, patch)
 
     # 5. Update checkpoint
-    _save_checkpoint(output_dir, condition, instance.instance_id)
+    _save_checkpoint(output_dir, condition, checkpoint, instance.instance_id)
 
 
 # ---------------------------------------------------------------------------
@@ -142,31 +182,64 @@ def _checkpoint_path(output_dir: Path, condition: ExperimentCondition) -> Path:
     return output_dir / condition.condition_id / "checkpoint.json"
 
 
+def _sidecar_path(path: Path) -> Path:
+    return path.with_suffix(".jsonl")
+
+
 def _load_checkpoint(
     output_dir: Path,
     condition: ExperimentCondition,
 ) -> set[str]:
-    """Load the set of completed instance IDs for a condition."""
+    """Load the set of completed instance IDs for a condition.
+
+    Merges ``checkpoint.json`` with the IDs appended to its sidecar since
+    the last flush.
+    """
     path = _checkpoint_path(output_dir, condition)
-    if not path.exists():
-        return set()
+    completed: set[str] = set()
+    if path.exists():
+        try:
+            data = json.loads(path.read_text())
+            completed.update(data.get("completed", []))
+        except (json.JSONDecodeError, KeyError):
+            pass
     try:
-        data = json.loads(path.read_text())
-        return set(data.get("completed", []))
-    except (json.JSONDecodeError, KeyError):
-        return set()
+        with open(_sidecar_path(path)) as f:
+            for line in f:
+                try:
+                    completed.add(json.loads(line))
+                except json.JSONDecodeError:
+                    continue  # torn final line from an interrupted run
+    except OSError:
+        pass
+    return completed
 
 
 def _save_checkpoint(
     output_dir: Path,
     condition: ExperimentCondition,
+    completed: set[str],
     instance_id: str,
 ) -> None:
-    """Mark an instance as completed in the checkpoint file."""
+    """Mark an instance as completed (appended to the checkpoint sidecar)."""
+    completed.add(instance_id)
     path = _checkpoint_path(output_dir, condition)
     path.parent.mkdir(parents=True, exist_ok=True)
+    with open(_sidecar_path(path), "a") as f:
+        f.write(json.dumps(instance_id) + "\n")
 
-    completed = _load_checkpoint(output_dir, condition)
-    completed.add(instance_id)
 
-    path.write_text(json.dumps({"completed": sorted(completed)}, indent=2))
+def _flush_checkpoint(
+    output_dir: Path,
+    condition: ExperimentCondition,
+    completed: set[str],
+) -> None:
+    """Compact the sidecar into ``checkpoint.json`` and remove it."""
+    path = _checkpoint_path(output_dir, condition)
+    sidecar = _sidecar_path(path)
+    if not sidecar.exists():
+        return
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_bytes(_dumps({"completed": sorted(completed)}))
+    os.replace(tmp, path)
+    sidecar.unlink(missing_ok=True)
@@ -0,0 +1,266 @@
+"""Persistent content-addressed cache for embedding vectors."""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Optional
+
+from openace.logging import get_logger
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = get_logger(__name__)
+
+DEFAULT_CACHE_DIR = "~/.cache/openace/embeddings"
+
+# Keep each IN (...) query under SQLite's bound-parameter limit
+_FETCH_CHUNK = 500
+
+# Calls with at most this many texts (search queries) go through the
+# in-memory LRU; larger indexing batches would only churn it.
+_MEMO_MAX_TEXTS = 16
+_MEMO_SIZE = 1024
+
+
+class EmbeddingCache:
+    """SQLite store mapping ``blake2b(scope|model:dim:text)`` to a float32 vector.
+
+    One database file per model under ``cache_dir``; ``scope`` separates
+    backends that serve the same model name (e.g. different API base URLs).
+    The connection is opened lazily and shared by all threads behind a lock;
+    WAL mode lets several processes use the same file. Any SQLite error
+    disables the cache for the rest of the process instead of failing the
+    embed call.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        dimension: int,
+        cache_dir: Optional[str] = None,
+        *,
+        scope: str = "",
+    ):
+        self._dimension = dimension
+        slug = re.sub(r"[^\w.-]+", "_", model).strip("_") or "default"
+        self._path = Path(os.path.expanduser(cache_dir or DEFAULT_CACHE_DIR)) / f"{slug}.db"
+        self._prefix = f"{scope}|{model}:{dimension}:".encode()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._disabled = False
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def key(self, text: str) -> bytes:
+        data = self._prefix + text.encode("utf-8", "surrogatepass")
+        return hashlib.blake2b(data, digest_size=16).digest()
+
+    def get_many(self, keys: list[bytes]) -> dict[bytes, bytes]:
+        """Return the stored vector bytes for every key that is cached."""
+        found: dict[bytes, bytes] = {}
+        expected = self._dimension * 4
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return found
+            try:
+                for i in range(0, len(keys), _FETCH_CHUNK):
+                    chunk = keys[i : i + _FETCH_CHUNK]
+                    marks = ",".join("?" * len(chunk))
+                    rows = conn.execute(
+                        f"SELECT key, vec FROM emb WHERE key IN ({marks})", chunk,
+                    )
+                    for key, vec in rows:
+                        if len(vec) == expected:
+                            found[key] = vec
+            except sqlite3.Error as e:
+                self._disable(e)
+        return found
+
+    def put_many(self, items: list[tuple[bytes, bytes]]) -> None:
+        """Store ``(key, vector bytes)`` pairs in one transaction."""
+        if not items:
+            return
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            try:
+                with conn:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO emb (key, vec) VALUES (?, ?)", items,
+                    )
+            except sqlite3.Error as e:
+                self._disable(e)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """Open the database on first use (caller must hold _lock)."""
+        if self._conn is not None or self._disabled:
+            return self._conn
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self._path), timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS emb (key BLOB PRIMARY KEY, vec BLOB NOT NULL)"
+            )
+            conn.commit()
+        except (OSError, sqlite3.Error) as e:
+            self._disable(e)
+            return None
+        self._conn = conn
+        return conn
+
+    def _disable(self, exc: Exception) -> None:
+        logger.warning(
+            "embedding cache disabled",
+            path=str(self._path),
+            exception_type=type(exc).__name__,
+            error=str(exc),
+        )
+        self._disabled = True
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except sqlite3.Error:
+                pass
+            self._conn = None
+
+
+class _VectorLRU:
+    """Thread-safe LRU of text -> vector for one embedder.
+
+    Uses an OrderedDict behind a lock, like AdaptiveStrategy's window.
+    """
+
+    def __init__(self, maxsize: int = _MEMO_SIZE):
+        self._maxsize = maxsize
+        self._data: OrderedDict[str, "np.ndarray"] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, texts: list[str]) -> dict[str, "np.ndarray"]:
+        found: dict[str, "np.ndarray"] = {}
+        with self._lock:
+            for text in texts:
+                vec = self._data.get(text)
+                if vec is not None:
+                    self._data.move_to_end(text)
+                    found[text] = vec
+        return found
+
+    def put_many(self, items) -> None:
+        with self._lock:
+            for text, vec in items:
+                self._data[text] = vec
+                self._data.move_to_end(text)
+            while len(self._data) > self._maxsize:
+                self._data.popitem(last=False)
+
+
+class _CachedEmbed:
+    """Mixin putting caches in front of an embedder's ``_embed_uncached``.
+
+    Small calls (search queries) are served from an in-memory LRU first;
+    everything else goes through the persistent :class:`EmbeddingCache`.
+    Subclasses call :meth:`_setup_cache` from ``__init__`` and implement
+    ``_embed_uncached(texts)`` returning a float32 array.
+    """
+
+    _embedding_cache: Optional[EmbeddingCache] = None
+    _query_memo: Optional[_VectorLRU] = None
+
+    def _setup_cache(
+        self,
+        model: str,
+        dimension: int,
+        enabled: bool,
+        cache_dir: Optional[str] = None,
+        *,
+        scope: str = "",
+    ) -> None:
+        if enabled:
+            self._embedding_cache = EmbeddingCache(model, dimension, cache_dir, scope=scope)
+            self._query_memo = _VectorLRU()
+
+    def embed(self, texts: list[str]) -> "np.ndarray":
+        """Embed texts, computing only those not already cached.
+
+        Args:
+            texts: List of text strings to embed.
+
+        Returns:
+            numpy array of shape (len(texts), dimension), dtype float32.
+        """
+        memo = self._query_memo
+        if memo is None or not texts or len(texts) > _MEMO_MAX_TEXTS:
+            return self._embed_stored(texts)
+
+        import numpy as np
+
+        found = memo.get_many(texts)
+        misses = [t for t in dict.fromkeys(texts) if t not in found]
+        if misses:
+            fresh = np.asarray(self._embed_stored(misses), dtype=np.float32)
+            new = [(t, fresh[i].copy()) for i, t in enumerate(misses)]
+            memo.put_many(new)
+            found.update(new)
+        return np.stack([found[t] for t in texts])
+
+    def _embed_stored(self, texts: list[str]) -> "np.ndarray":
+        cache = self._embedding_cache
+        if cache is None or not texts:
+            return self._embed_uncached(texts)
+        return _embed_through_cache(cache, texts, self._embed_uncached, self.dimension)
+
+    def _embed_uncached(self, texts: list[str]) -> "np.ndarray":
+        raise NotImplementedError
+
+
+def _embed_through_cache(
+    cache: EmbeddingCache,
+    texts: list[str],
+    embed_fn: Callable[[list[str]], "np.ndarray"],
+    dimension: int,
+) -> "np.ndarray":
+    import numpy as np
+
+    keys = [cache.key(t) for t in texts]
+    found = cache.get_many(list(dict.fromkeys(keys)))
+
+    # Each distinct missing text is embedded once
+    miss_rows: dict[bytes, int] = {}
+    miss_texts: list[str] = []
+    for key, text in zip(keys, texts):
+        if key not in found and key not in miss_rows:
+            miss_rows[key] = len(miss_texts)
+            miss_texts.append(text)
+
+    fresh = embed_fn(miss_texts) if miss_texts else None
+    if fresh is not None:
+        fresh = np.asarray(fresh, dtype=np.float32)
+        cache.put_many([(key, fresh[row].tobytes()) for key, row in miss_rows.items()])
+
+    out = np.empty((len(texts), dimension), dtype=np.float32)
+    for i, key in enumerate(keys):
+        vec = found.get(key)
+        if vec is not None:
+            out[i] = np.frombuffer(vec, dtype=np.float32)
+        else:
+            out[i] = fresh[miss_rows[key]]
+    return out
@@ -6,22 +6,53 @@ import os
 from pathlib import Path
 from typing import Optional
 
+from openace.embedding.cache import _CachedEmbed
+from openace.logging import get_logger
 
-class OnnxEmbedder:
+logger = get_logger(__name__)
+
+_QUANTIZATIONS = ("int8", "fp32")
+
+
+class OnnxEmbedder(_CachedEmbed):
     """Local embedding using ONNX Runtime with all-MiniLM-L6-v2 (384-dim).
 
     Model is lazily downloaded on first use to ~/.cache/openace/models/.
+    Vectors are cached in memory for repeated queries and on disk under
+    ~/.cache/openace/embeddings/ unless ``cache_embeddings=False``.
+    ``quantization="int8"`` opts into a dynamically quantized copy of the
+    model (model_int8.onnx, produced once next to the FP32 file); its
+    vectors differ slightly, so indexes should be rebuilt when switching.
+    If the int8 model cannot be produced, the FP32 model is used instead.
     Requires: pip install openace[onnx]
     """
 
     MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
     _DIMENSION = 384
 
-    def __init__(self, *, cache_dir: Optional[str] = None, batch_size: int = 32):
+    def __init__(
+        self,
+        *,
+        cache_dir: Optional[str] = None,
+        batch_size: int = 32,
+        cache_embeddings: bool = True,
+        embedding_cache_dir: Optional[str] = None,
+        quantization: str = "fp32",
+    ):
+        if quantization not in _QUANTIZATIONS:
+            raise ValueError(
+                f"Unknown quantization: {quantization!r}. Use 'int8' or 'fp32'."
+            )
         self._cache_dir = Path(cache_dir or os.path.expanduser("~/.cache/openace/models"))
         self._batch_size = batch_size
+        self._quantization = quantization
         self._session = None
         self._tokenizer = None
+        # int8 vectors differ slightly from FP32 ones, so cache them apart
+        self._setup_cache(
+            self.MODEL_NAME, self._DIMENSION, cache_embeddings, embedding_cache_dir,
+            scope="int8" if quantization == "int8" else "",
+        )
 
     @property
     def dimension(self) -> int:
@@ -50,12 +81,50 @@ class OnnxEmbedder:
 
         self._tokenizer = Tokenizer.from_file(str(tokenizer_path))
         self._tokenizer.enable_truncation(max_length=512)
-        self._tokenizer.enable_padding(length=512)
+        # Pad each batch only to its longest sequence, not to max_length
+        self._tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
+
+        if self._quantization == "int8":
+            model_path = self._quantized_model(model_path)
 
         sess_options = ort.SessionOptions()
         sess_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if self._quantization == "int8":
+            # Thread cap applies to the opt-in int8 session only; FP32 keeps
+            # ONNX Runtime's default of one thread per physical core.
+            sess_options.intra_op_num_threads = min(4, os.cpu_count() or 1)
         self._session = ort.InferenceSession(str(model_path), sess_options)
 
+    def _quantized_model(self, model_path: Path) -> Path:
+        """Return the int8 model, quantizing ``model_path`` on first use.
+
+        Falls back to ``model_path`` if quantization is unavailable or fails.
+        """
+        int8_path = model_path.with_name("model_int8.onnx")
+        if int8_path.exists():
+            return int8_path
+
+        tmp_path = int8_path.with_name(f"{int8_path.name}.{os.getpid()}.tmp")
+        try:
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+
+            quantize_dynamic(
+                str(model_path),
+                str(tmp_path),
+                weight_type=QuantType.QInt8,
+                op_types_to_quantize=["MatMul"],
+            )
+            os.replace(tmp_path, int8_path)
+        except Exception as e:
+            logger.warning(
+                "int8 quantization unavailable, using fp32 model",
+                exception_type=type(e).__name__,
+                error=str(e),
+            )
+            tmp_path.unlink(missing_ok=True)
+            return model_path
+        return int8_path
+
     def _download_model(self, model_dir: Path):
         """Download model files from Hugging Face Hub."""
         try:
@@ -76,7 +145,7 @@ class OnnxEmbedder:
                 local_dir_use_symlinks=False,
             )
 
-    def embed(self, texts: list[str]) -> "numpy.ndarray":
+    def _embed_uncached(self, texts: list[str]) -> "numpy.ndarray":
         """Embed texts using local ONNX model.
 
         Args:
@@ -89,16 +158,18 @@ class OnnxEmbedder:
 
         self._load_model()
 
-        all_embeddings = []
-        for i in range(0, len(texts), self._batch_size):
-            batch = texts[i : i + self._batch_size]
-            batch_embeddings = self._embed_batch(batch)
-            all_embeddings.append(batch_embeddings)
-
-        if not all_embeddings:
+        if not texts:
             return np.zeros((0, self._DIMENSION), dtype=np.float32)
 
-        return np.vstack(all_embeddings)
+        # Batch texts of similar length together so dynamic padding stays
+        # short; character length is a cheap proxy for token count.
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        out = np.empty((len(texts), self._DIMENSION), dtype=np.float32)
+        for i in range(0, len(order), self._batch_size):
+            rows = order[i : i + self._batch_size]
+            out[rows] = self._embed_batch([texts[r] for r in rows])
+
+        return out
 
     def _embed_batch(self, texts: list[str]) -> "numpy.ndarray":
         """Embed a single batch."""
@@ -119,16 +190,18 @@ class OnnxEmbedder:
             },
         )
 
-        # Mean pooling over token embeddings
-        token_embeddings = outputs[0]  # (batch, seq_len, hidden_dim)
-        mask_expanded = attention_mask[:, :, np.newaxis].astype(np.float32)
-        sum_embeddings = np.sum(token_embeddings * mask_expanded, axis=1)
-        sum_mask = np.clip(mask_expanded.sum(axis=1), a_min=1e-9, a_max=None)
-        mean_embeddings = sum_embeddings / sum_mask
-
-        # L2 normalize
-        norms = np.linalg.norm(mean_embeddings, axis=1, keepdims=True)
-        norms = np.clip(norms, a_min=1e-9, a_max=None)
-        normalized = mean_embeddings / norms
-
-        return normalized.astype(np.float32)
+        # Mean pooling over token embeddings: one einsum pass computes the
+        # masked sum without materialising a (batch, seq_len, hidden) product.
+        token_embeddings = np.asarray(outputs[0], dtype=np.float32)  # (batch, seq_len, hidden_dim)
+        mask = attention_mask.astype(np.float32)
+        pooled = np.einsum("bsh,bs->bh", token_embeddings, mask, optimize=True)
+        lengths = mask.sum(axis=1, keepdims=True)
+        np.maximum(lengths, 1e-9, out=lengths)
+        pooled /= lengths
+
+        # L2 normalize in place
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        np.maximum(norms, 1e-9, out=norms)
+        pooled /= norms
+
+        return pooled
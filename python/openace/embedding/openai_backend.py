@@ -8,14 +8,17 @@ from typing import Optional
 
 import structlog
 
+from openace.embedding.cache import _CachedEmbed
 from openace.logging import get_logger
 
 logger = get_logger(__name__)
 
 
-class OpenAIEmbedder:
+class OpenAIEmbedder(_CachedEmbed):
     """Embedding using OpenAI API.
 
+    Vectors are cached in memory for repeated queries and on disk under
+    ~/.cache/openace/embeddings/ unless ``cache_embeddings=False``.
     Requires: pip install openace[openai]
     Set OPENAI_API_KEY environment variable.
     """
@@ -32,6 +35,8 @@ class OpenAIEmbedder:
         extra_body: Optional[dict] = None,
         max_retries: int = 2,
         request_delay: float = 0.0,
+        cache_embeddings: bool = True,
+        embedding_cache_dir: Optional[str] = None,
     ):
         self._model = model
         self._dimension = dim
@@ -43,6 +48,9 @@ class OpenAIEmbedder:
         self._max_retries = max_retries
         self._request_delay = request_delay
         self._client = None
+        self._setup_cache(
+            model, dim, cache_embeddings, embedding_cache_dir, scope=base_url or "",
+        )
 
     @property
     def dimension(self) -> int:
@@ -109,7 +117,7 @@ class OpenAIEmbedder:
                     raise
         return []
 
-    def embed(self, texts: list[str]) -> "numpy.ndarray":
+    def _embed_uncached(self, texts: list[str]) -> "numpy.ndarray":
         """Embed texts using OpenAI API.
 
         Args:
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import copy
 import os
 import re
 import uuid
@@ -230,6 +231,16 @@ class Engine:
         """The absolute path to the project root."""
         return self._project_root
 
+    def with_reranker(self, reranker: Optional[Reranker]) -> Engine:
+        """Return an engine sharing this one's index but using ``reranker``.
+
+        The returned engine searches the same underlying index, so an
+        index built once can be queried with and without reranking.
+        """
+        view = copy.copy(self)
+        view._reranker = reranker
+        return view
+
     def index(self, *, incremental: bool = True, force_full: bool = False,
               trace_id: Optional[str] = None) -> IndexReport:
         """Run indexing on the project.
@@ -384,6 +395,7 @@ class Engine:
         file_path: Optional[str] = None,
         dedupe_by_file: bool = True,
         trace_id: Optional[str] = None,
+        query_vector: Optional[list[float]] = None,
     ) -> list[SearchResult]:
         """Search for symbols using multi-signal retrieval.
 
@@ -395,6 +407,8 @@ class Engine:
             dedupe_by_file: If True, keep only the highest-scoring symbol
                 per file so that results cover more distinct files.
             trace_id: Optional trace ID for correlation.
+            query_vector: Precomputed embedding of ``query``. When given,
+                the embedding provider is not called.
 
         Returns:
             List of SearchResult sorted by relevance score.
@@ -420,8 +434,7 @@ class Engine:
                             error=str(e),
                         )
 
-                query_vector = None
-                if self._embedding_provider is not None:
+                if query_vector is None and self._embedding_provider is not None:
                     vectors = self._embedding_provider.embed([query])
                     query_vector = vectors[0].tolist()
 
@@ -583,6 +596,62 @@ class Engine:
             except Exception as e:
                 raise SearchError(f"search failed: {e}") from e
 
+    def embed_queries(
+        self, queries: list[str], *, trace_id: Optional[str] = None,
+    ) -> list[Optional[list[float]]]:
+        """Embed several queries with a single provider call.
+
+        The returned vectors can be passed to :meth:`search` via
+        ``query_vector`` so that N searches cost one embedding round-trip.
+
+        Args:
+            queries: Query texts.
+            trace_id: Optional trace ID for correlation.
+
+        Returns:
+            One vector per query, or ``None`` entries when no embedding
+            provider is configured.
+        """
+        if self._embedding_provider is None or not queries:
+            return [None] * len(queries)
+        trace_id = trace_id or uuid.uuid4().hex[:16]
+        with structlog.contextvars.bound_contextvars(trace_id=trace_id):
+            try:
+                vectors = self._embedding_provider.embed(list(queries))
+                return [v.tolist() for v in vectors]
+            except Exception as e:
+                raise SearchError(f"query embedding failed: {e}") from e
+
+    def search_batch(
+        self,
+        queries: list[str],
+        *,
+        limit: int = 10,
+        language: Optional[str] = None,
+        file_path: Optional[str] = None,
+        dedupe_by_file: bool = True,
+        trace_id: Optional[str] = None,
+    ) -> list[list[SearchResult]]:
+        """Run :meth:`search` for each query, embedding all queries at once.
+
+        Returns:
+            One result list per query, in input order.
+        """
+        trace_id = trace_id or uuid.uuid4().hex[:16]
+        vectors = self.embed_queries(queries, trace_id=trace_id)
+        return [
+            self.search(
+                q,
+                limit=limit,
+                language=language,
+                file_path=file_path,
+                dedupe_by_file=dedupe_by_file,
+                trace_id=trace_id,
+                query_vector=vec,
+            )
+            for q, vec in zip(queries, vectors)
+        ]
+
     def find_symbol(self, name: str, *, trace_id: Optional[str] = None) -> list[Symbol]:
         """Find symbols by exact name match.
 
@@ -0,0 +1,47 @@
+"""Tests for the ace-tool evaluation metrics."""
+
+import pytest
+
+from eval.ace_tool_eval import (
+    AceToolInstanceResult,
+    compute_instance_metrics,
+    compute_instance_metrics_fast,
+)
+
+
+def _results() -> list[AceToolInstanceResult]:
+    return [
+        # Hits at ranks 2 and 4
+        AceToolInstanceResult(
+            "hits", ["a.py", "b.py"], ["f", "g"],
+            ["x.py", "a.py", "y.py", "b.py"], ["g", "h", "f"],
+        ),
+        # Empty gold counts as full recall
+        AceToolInstanceResult("empty_gold", [], [], ["a.py"], ["f"]),
+        # Duplicate retrieved ids are only counted once
+        AceToolInstanceResult(
+            "duplicates", ["a.py"], ["f"],
+            ["a.py", "a.py", "c.py"], ["f", "f"],
+        ),
+        # Nothing retrieved
+        AceToolInstanceResult("no_results", ["a.py"], ["f"], [], []),
+        # Basename fallback and a gold hit past rank 20
+        AceToolInstanceResult(
+            "deep", ["pkg/mod.py", "z.py"], ["k"],
+            ["other/mod.py"] + [f"n{i}.py" for i in range(25)] + ["z.py"], ["k"],
+        ),
+    ]
+
+
+class TestComputeInstanceMetricsFast:
+    def test_matches_pure_python(self):
+        pytest.importorskip("numba")
+        results = _results()
+        expected = [compute_instance_metrics(r) for r in results]
+        assert compute_instance_metrics_fast(results) == expected
+
+    def test_empty_gold_is_full_recall(self):
+        metrics = compute_instance_metrics(_results()[1])
+        assert metrics["file_recall_at_1"] == 1.0
+        assert metrics["function_recall_at_5"] == 1.0
+        assert metrics["first_gold_file_rank"] == 0
@@ -42,6 +42,21 @@ class TestOnnxEmbedder:
         embedder = OnnxEmbedder(cache_dir=str(tmp_path / "models"))
         assert embedder.dimension == 384
 
+    def test_defaults_to_fp32(self):
+        from openace.embedding.local import OnnxEmbedder
+        assert OnnxEmbedder()._quantization == "fp32"
+
+    def test_unknown_quantization_raises(self):
+        from openace.embedding.local import OnnxEmbedder
+        with pytest.raises(ValueError, match="quantization"):
+            OnnxEmbedder(quantization="int4")
+
+    def test_quantization_separates_cache_keys(self, tmp_path):
+        from openace.embedding.local import OnnxEmbedder
+        int8 = OnnxEmbedder(embedding_cache_dir=str(tmp_path), quantization="int8")
+        fp32 = OnnxEmbedder(embedding_cache_dir=str(tmp_path))
+        assert int8._embedding_cache.key("x") != fp32._embedding_cache.key("x")
+
 
 class TestOpenAIEmbedder:
     """Tests that don't require API key."""
@@ -212,3 +227,102 @@ class TestConcurrentEmbedAll:
         # Don't index -- no symbols
         count = engine.embed_all()
         assert count == 0
+
+
+class TestEmbeddingCache:
+    """Tests for the persistent embedding cache (no model or API needed)."""
+
+    def _embedder(self, tmp_path):
+        from openace.embedding.local import OnnxEmbedder
+        embedder = OnnxEmbedder(embedding_cache_dir=str(tmp_path / "emb"))
+        calls = []
+
+        def fake_embed(texts):
+            calls.append(list(texts))
+            return np.array(
+                [[float(len(t))] * embedder.dimension for t in texts], dtype=np.float32,
+            )
+
+        embedder._embed_uncached = fake_embed
+        return embedder, calls
+
+    def test_second_call_hits_cache(self, tmp_path):
+        embedder, calls = self._embedder(tmp_path)
+        first = embedder.embed(["a", "bb"])
+        second = embedder.embed(["a", "bb"])
+        assert calls == [["a", "bb"]]
+        np.testing.assert_array_equal(first, second)
+        assert second.dtype == np.float32
+        assert second.shape == (2, 384)
+
+    def test_only_misses_are_embedded_in_order(self, tmp_path):
+        embedder, calls = self._embedder(tmp_path)
+        embedder.embed(["bb"])
+        out = embedder.embed(["a", "bb", "ccc", "a"])
+        assert calls == [["bb"], ["a", "ccc"]]
+        assert out[:, 0].tolist() == [1.0, 2.0, 3.0, 1.0]
+
+    def test_cache_persists_across_instances(self, tmp_path):
+        embedder, _ = self._embedder(tmp_path)
+        embedder.embed(["persist me"])
+        fresh, calls = self._embedder(tmp_path)
+        fresh.embed(["persist me"])
+        assert calls == []
+
+    def test_disabled_cache_always_embeds(self, tmp_path):
+        from openace.embedding.local import OnnxEmbedder
+        embedder = OnnxEmbedder(cache_embeddings=False)
+        calls = []
+        embedder._embed_uncached = lambda texts: calls.append(texts) or np.zeros(
+            (len(texts), 384), dtype=np.float32,
+        )
+        embedder.embed(["a"])
+        embedder.embed(["a"])
+        assert len(calls) == 2
+
+    def test_scope_separates_backends(self, tmp_path):
+        from openace.embedding.cache import EmbeddingCache
+        a = EmbeddingCache("m", 4, str(tmp_path), scope="https://a")
+        b = EmbeddingCache("m", 4, str(tmp_path), scope="https://b")
+        assert a.path == b.path
+        assert a.key("x") != b.key("x")
+
+    def test_repeated_query_skips_disk_lookup(self, tmp_path):
+        embedder, calls = self._embedder(tmp_path)
+        first = embedder.embed(["find the parser"])
+        embedder._embedding_cache.get_many = MagicMock(return_value={})
+        second = embedder.embed(["find the parser"])
+        embedder._embedding_cache.get_many.assert_not_called()
+        assert calls == [["find the parser"]]
+        np.testing.assert_array_equal(first, second)
+
+    def test_returned_array_does_not_alias_memo(self, tmp_path):
+        embedder, _ = self._embedder(tmp_path)
+        out = embedder.embed(["q"])
+        out[:] = -1.0
+        assert embedder.embed(["q"])[0, 0] == 1.0
+
+    def test_vector_lru_evicts_oldest(self):
+        from openace.embedding.cache import _VectorLRU
+        lru = _VectorLRU(maxsize=2)
+        lru.put_many([("a", np.zeros(1)), ("b", np.zeros(1))])
+        lru.get_many(["a"])
+        lru.put_many([("c", np.zeros(1))])
+        assert set(lru.get_many(["a", "b", "c"])) == {"a", "c"}
+
+    def test_onnx_batches_by_length_and_keeps_order(self):
+        from openace.embedding.local import OnnxEmbedder
+        embedder = OnnxEmbedder(batch_size=2, cache_embeddings=False)
+        embedder._session = object()  # skip model loading
+        batches = []
+
+        def fake_batch(texts):
+            batches.append(list(texts))
+            return np.array(
+                [[float(len(t))] * embedder.dimension for t in texts], dtype=np.float32,
+            )
+
+        embedder._embed_batch = fake_batch
+        out = embedder.embed(["cccc", "a", "ddddd", "bb"])
+        assert batches == [["a", "bb"], ["cccc", "ddddd"]]
+        assert out[:, 0].tolist() == [4.0, 1.0, 5.0, 2.0]
@@ -76,6 +76,39 @@ class TestEngineSearch:
         assert len(results) > 0
         assert len(results[0].match_signals) > 0
 
+    def test_search_batch_matches_search(self, sample_project):
+        engine = Engine(str(sample_project))
+        engine.index()
+
+        queries = ["process_data", "validate"]
+        batched = engine.search_batch(queries, limit=5)
+        assert len(batched) == len(queries)
+        for q, results in zip(queries, batched):
+            single = engine.search(q, limit=5)
+            assert [r.symbol_id for r in results] == [r.symbol_id for r in single]
+
+    def test_with_reranker_shares_index(self, sample_project):
+        engine = Engine(str(sample_project))
+        engine.index()
+
+        calls = []
+
+        class RecordingReranker:
+            def rerank(self, query, results, *, top_k=None):
+                calls.append(query)
+                return results
+
+        view = engine.with_reranker(RecordingReranker())
+        assert len(view.search("process_data")) > 0
+        assert calls == ["process_data"]
+
+        engine.search("process_data")  # original engine stays unreranked
+        assert calls == ["process_data"]
+
+    def test_embed_queries_without_provider(self, sample_project):
+        engine = Engine(str(sample_project))
+        assert engine.embed_queries(["a", "b"]) == [None, None]
+
 
 class TestEngineFindSymbol:
     def test_find_by_name(self, sample_project):